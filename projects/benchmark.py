@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+import exhaustive_search
+import greedy_search
+import matching_search
+import randomized_search
+from counters import OperationCounter
+from deadline import Deadline
+from graph import Graph, build_graph
+from graph_generator import generate_graph
+from twitch_dataset import DATASETS, load_twitch
+
+
+# every solver as f(graph, nr_edge_cover, deadline, operation counter) -> (success, edge cover, work),
+# work being the configurations tested or decisions made (see each solver)
+SOLVERS: Dict[str, Callable] = {
+    'exhaustive': exhaustive_search.find_edge_cover_exhaustive_bitmask,
+    'branch_and_bound': exhaustive_search.find_edge_cover_branch_and_bound,
+    'greedy': greedy_search.find_edge_cover_greedy,
+    # seeded, so every repetition runs the same restarts
+    'randomized': lambda graph, nr_edge_cover, deadline, counter: randomized_search.find_edge_cover_randomized(
+        graph, nr_edge_cover, seed=BENCHMARK_SEED, deadline=deadline, counter=counter),
+    'matching': matching_search.find_edge_cover_matching,
+}
+
+BENCHMARK_SEED = 108713
+VERTICES = [10, 20, 50, 100, 200]
+DENSITIES = [0.125, 0.25, 0.5, 0.75]
+KVALUES = [0.125, 0.25, 0.5, 0.75]
+REPORTS_FOLDER = 'results/benchmarks'
+
+
+""" MEASUREMENT FUNCTIONS """
+
+def machine_fingerprint() -> Dict:
+    """What the numbers of a report depend on besides the code, to compare reports between hosts."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'host': socket.gethostname(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': f"{platform.python_implementation()} {platform.python_version()}",
+        'commit': commit,
+    }
+
+def measure(solver: Callable, graph: Graph, nr_edge_cover: int, repeat: int, warmup: int,
+            time_limit: Optional[float]) -> Dict:
+    """
+    Run a solver warmup + repeat times and summarise the repeat timings (in nanoseconds).
+    A run stopped by the time limit ends the measurement, the case is reported as timed out.
+    """
+    timings: List[int] = []
+    for run in range(warmup + repeat):
+        deadline = Deadline(time_limit)
+        operations = OperationCounter()
+        start = time.perf_counter_ns()
+        success, edge_cover, work = solver(graph, nr_edge_cover, deadline, operations)
+        elapsed = time.perf_counter_ns() - start
+        if deadline.reached:
+            return {'timed_out': True, 'success': success, 'work': work, 'time_limit': time_limit}
+        if run >= warmup:
+            timings.append(elapsed)
+
+    quartiles = statistics.quantiles(timings, n=4) if len(timings) > 1 else [timings[0]] * 3
+    return {
+        'timed_out': False,
+        'success': success,
+        'cover_size': len(edge_cover),
+        'work': work,
+        'operation_counts': operations.counts,
+        'repeat': repeat,
+        'median_ns': statistics.median(timings),
+        'iqr_ns': quartiles[2] - quartiles[0],
+        'min_ns': min(timings),
+        'max_ns': max(timings),
+    }
+
+
+""" GRAPHS """
+
+def generated_graph(num_vertices: int, density: float) -> Graph:
+    """Graph of graph_generator.py, the same for every run and host (seeded by its size and density)."""
+    random.seed(f"{BENCHMARK_SEED}-{num_vertices}-{density}")
+    vertices, adjacency = generate_graph(num_vertices, density)
+    edge_u, edge_v = array('i'), array('i')
+    for u, vertex_neighbors in enumerate(adjacency):
+        for v in vertex_neighbors:
+            if u < v:
+                edge_u.append(u)
+                edge_v.append(v)
+    return build_graph([str(vertex) for vertex in vertices], edge_u, edge_v)
+
+def benchmark_graphs(vertices: List[int], densities: List[float], twitch: List[str]) -> List[Tuple[str, Dict, Graph]]:
+    """(name, description, graph) of every graph of the grid and of the Twitch datasets."""
+    graphs = []
+    for num_vertices in vertices:
+        for density in densities:
+            graphs.append((f"generated_{num_vertices}_{density:g}", {'vertices': num_vertices, 'density': density},
+                           generated_graph(num_vertices, density)))
+    for dataset in twitch:
+        graphs.append((f"twitch_{dataset}", {'dataset': dataset}, load_twitch(dataset)))
+    return graphs
+
+
+""" BENCHMARK """
+
+def run_benchmark(solvers: List[str], vertices: List[int], densities: List[float], kvalues: List[float],
+                  twitch: List[str], repeat: int = 5, warmup: int = 1, time_limit: Optional[float] = 10) -> Dict:
+    """
+    Measure every solver on every (graph, k) case.
+    Like experiment.py, once a solver times out on a generated graph, the bigger graphs of
+    the same density are skipped for that solver and k.
+    """
+    cases = []
+    timed_out: Dict[Tuple[str, float, float], int] = {}
+    for name, description, graph in benchmark_graphs(vertices, densities, twitch):
+        for solver_name in solvers:
+            for k in kvalues:
+                case = {'graph': name, **description, 'num_vertices': graph.num_vertices,
+                        'num_edges': graph.num_edges, 'solver': solver_name, 'k': k}
+                key = (solver_name, description.get('density'), k)
+                if 'vertices' in description and key in timed_out and description['vertices'] > timed_out[key]:
+                    cases.append({**case, 'skipped': True})
+                    continue
+
+                result = measure(SOLVERS[solver_name], graph, int(graph.num_edges * k), repeat, warmup, time_limit)
+                if result['timed_out'] and 'vertices' in description:
+                    timed_out[key] = min(timed_out.get(key, description['vertices']), description['vertices'])
+                cases.append({**case, **result})
+
+                status = 'timeout' if result['timed_out'] else \
+                    f"{result['median_ns'] / 1e6:10.3f} ms ± {result['iqr_ns'] / 1e6:.3f}"
+                print(f"{name:<22} {solver_name:<16} k={k:<5} {status}", flush=True)
+
+    return {
+        'machine': machine_fingerprint(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': {'repeat': repeat, 'warmup': warmup, 'time_limit': time_limit, 'seed': BENCHMARK_SEED},
+        'cases': cases,
+    }
+
+def save_report(report: Dict, filename: Optional[str] = None) -> str:
+    if filename is None:
+        os.makedirs(REPORTS_FOLDER, exist_ok=True)
+        stamp = report['created'].replace(':', '').replace('-', '')
+        filename = os.path.join(REPORTS_FOLDER, f"benchmark_{report['machine']['host']}_{stamp}.json")
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=4)
+    return filename
+
+def compare_reports(baseline_filename: str, other_filename: str):
+    """Print the ratio of the medians (other / baseline) of the cases both reports measured."""
+    with open(baseline_filename, 'r') as f:
+        baseline = json.load(f)
+    with open(other_filename, 'r') as f:
+        other = json.load(f)
+
+    def measured(report: Dict) -> Dict[Tuple[str, str, float], Dict]:
+        return {(case['graph'], case['solver'], case['k']): case for case in report['cases']
+                if not case.get('skipped') and not case['timed_out']}
+
+    baseline_cases, other_cases = measured(baseline), measured(other)
+    print(f"baseline: {baseline['machine']['host']} {baseline['machine']['commit']} ({baseline['created']})")
+    print(f"other:    {other['machine']['host']} {other['machine']['commit']} ({other['created']})")
+    ratios = []
+    for key in sorted(baseline_cases.keys() & other_cases.keys()):
+        ratio = other_cases[key]['median_ns'] / max(baseline_cases[key]['median_ns'], 1)
+        ratios.append(ratio)
+        print(f"{key[0]:<22} {key[1]:<16} k={key[2]:<5} {ratio:8.3f}x")
+    if ratios:
+        print(f"geometric mean: {statistics.geometric_mean(ratios):.3f}x over {len(ratios)} cases")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        if len(sys.argv) != 4:
+            print("Usage: python3 benchmark.py compare <baseline_report> <other_report>")
+            sys.exit(1)
+        compare_reports(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Benchmark the edge cover solvers over a (vertices, density, k) grid and the Twitch graphs")
+    parser.add_argument('--solvers', nargs='+', default=list(SOLVERS), choices=list(SOLVERS))
+    parser.add_argument('--vertices', nargs='+', type=int, default=VERTICES)
+    parser.add_argument('--densities', nargs='+', type=float, default=DENSITIES)
+    parser.add_argument('--k', nargs='+', type=float, default=KVALUES)
+    parser.add_argument('--twitch', nargs='*', default=[], choices=DATASETS, help="Twitch datasets to include (default: none)")
+    parser.add_argument('--repeat', type=int, default=5, help="measured runs per case (default: 5)")
+    parser.add_argument('--warmup', type=int, default=1, help="runs before measuring (default: 1)")
+    parser.add_argument('--time-limit', type=float, default=10, help="seconds per run before the case counts as timed out (default: 10)")
+    parser.add_argument('--output', default=None, help=f"report file (default: {REPORTS_FOLDER}/benchmark_<host>_<time>.json)")
+    arguments = parser.parse_args()
+
+    report = run_benchmark(arguments.solvers, arguments.vertices, arguments.densities, arguments.k,
+                           arguments.twitch, arguments.repeat, arguments.warmup, arguments.time_limit)
+    print(f"Report written to {save_report(report, arguments.output)}")
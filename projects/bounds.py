@@ -0,0 +1,54 @@
+from array import array
+from typing import List, Optional, Set, Tuple
+
+from components import UnionFind
+from counters import NULL_COUNTER, OperationCounter
+from graph import Graph
+
+
+""" FEASIBILITY BOUNDS """
+
+class FeasibilityBounds:
+    """
+    Counts of a graph that settle "is there an edge cover of k edges" for most k without
+    a search. Built once per graph in O(V + E), then check() is O(1) for every k:
+    - an isolated vertex can never be covered: no k is feasible
+    - k edges cover at most 2k vertices: k < ceil(n / 2) is infeasible
+    - without isolated vertices a spanning forest (n - number of components edges) is a
+      cover: any k from there up to the number of edges is feasible
+    """
+
+    def __init__(self, graph: Graph, counter: Optional[OperationCounter] = None):
+        self.num_vertices = graph.num_vertices
+        self.num_edges = graph.num_edges
+        self.isolated = sum(1 for vertex in range(graph.num_vertices) if graph.degree(vertex) == 0)
+
+        sets = UnionFind(graph.num_vertices)
+        self.forest = array('i', (edge for edge in range(graph.num_edges) if sets.union(graph.edge_u[edge], graph.edge_v[edge])))
+        self.components = graph.num_vertices - len(self.forest)
+        (counter or NULL_COUNTER).record(degree_reads=graph.num_vertices, unions=graph.num_edges)
+
+    def check(self, nr_edge_cover: int) -> Optional[bool]:
+        """False when no cover of nr_edge_cover edges exists, True when one does, None when a search must decide."""
+        if self.isolated or nr_edge_cover < (self.num_vertices + 1) // 2 or nr_edge_cover > self.num_edges:
+            return False
+        if nr_edge_cover >= self.num_vertices - self.components:
+            return True
+        return None
+
+def resolve_by_bounds(bounds: FeasibilityBounds, nr_edge_cover: int) -> Optional[Tuple[bool, Set[int], int]]:
+    """
+    The answer of a search, (success, edge cover, work done), when the bounds decide nr_edge_cover:
+    the spanning forest when it is feasible, no cover otherwise, and no work either way.
+    None when a search must decide.
+    """
+    feasible = bounds.check(nr_edge_cover)
+    if feasible is None:
+        return None
+    return feasible, set(bounds.forest) if feasible else set(), 0
+
+def resolve_all_by_bounds(graph: Graph, nr_edge_covers: List[int],
+                          counter: Optional[OperationCounter] = None) -> List[Optional[Tuple[bool, Set[int], int]]]:
+    """resolve_by_bounds for several budgets of the same graph, building the bounds once."""
+    bounds = FeasibilityBounds(graph, counter)
+    return [resolve_by_bounds(bounds, nr_edge_cover) for nr_edge_cover in nr_edge_covers]
@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+from array import array
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from counters import NULL_COUNTER, OperationCounter
+from deadline import Deadline
+from graph import Graph, induced_subgraph
+
+
+# components with fewer edges are solved in this process, starting a worker costs more than solving them
+PARALLEL_MIN_EDGES = 64
+
+
+""" HELP FUNCTIONS """
+
+class UnionFind:
+    """Disjoint sets over 0..n-1, union by size and path halving."""
+
+    def __init__(self, size: int):
+        self.parent = array('i', range(size))
+        self.size = array('i', [1]) * size
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> bool:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+def connected_components(graph: Graph, counter: Optional[OperationCounter] = None) -> List[List[int]]:
+    """
+    Vertices of every connected component (each list sorted), in order of their lowest vertex.
+
+    Basic Operations Count (recorded in counter):
+    1 union per edge and 1 find per vertex
+    """
+    sets = UnionFind(graph.num_vertices)
+    for edge in range(graph.num_edges):
+        sets.union(graph.edge_u[edge], graph.edge_v[edge])
+
+    members: Dict[int, List[int]] = {}
+    for vertex in range(graph.num_vertices):
+        members.setdefault(sets.find(vertex), []).append(vertex)
+    (counter or NULL_COUNTER).record(unions=graph.num_edges, finds=graph.num_vertices)
+    return list(members.values())
+
+
+""" ALGORITHM FUNCTIONS """
+
+def solve_component(solver: Callable, graph: Graph, lower: int, upper: int, smallest_first: bool,
+                    deadline: Deadline, counter: OperationCounter) -> Tuple[bool, Set[int], int]:
+    """
+    Smallest cover of one component the solver finds with a budget in lower..upper.
+    Exact solvers (smallest_first) try every budget from lower up and stop at the first
+    success, so the cover is a minimum one. The others run once with the whole budget,
+    their cover is as small as they can make it anyway.
+    Returns (success, edge cover, work) with work the sum of the third values of the solver.
+    """
+    budgets = range(lower, upper + 1) if smallest_first else [upper]
+    work = 0
+    edge_cover: Set[int] = set()
+    for budget in budgets:
+        success, edge_cover, budget_work = solver(graph, budget, deadline=deadline, counter=counter)
+        work += budget_work
+        if success or deadline.reached:
+            return success, edge_cover, work
+    return False, edge_cover, work
+
+def component_worker(solver: Callable, graph: Graph, lower: int, upper: int, smallest_first: bool,
+                     deadline: Deadline) -> Tuple[bool, Set[int], int, Dict[str, int], bool]:
+    """solve_component in a worker process, also returns the operation counts and whether the deadline was reached."""
+    counter = OperationCounter()
+    success, edge_cover, work = solve_component(solver, graph, lower, upper, smallest_first, deadline, counter)
+    return success, edge_cover, work, counter.counts, deadline.reached
+
+def find_edge_cover_by_components(graph: Graph, nr_edge_cover: int, solver: Callable, deadline: Optional[Deadline] = None,
+                                  counter: Optional[OperationCounter] = None, workers: Optional[int] = None,
+                                  smallest_first: bool = False) -> Tuple[bool, Set[int], int]:
+    """
+    Run solver(graph, budget, deadline=deadline, counter=counter) on every connected component separately.
+    A cover of the graph is a cover of every component, so the components are independent
+    problems and their cover sizes add up against the global budget: component i may use
+    at most nr_edge_cover minus ceil(n_j / 2) (the fewest edges that cover n_j vertices)
+    for every other component j. Components with at least PARALLEL_MIN_EDGES edges are
+    solved on up to workers processes (one per CPU by default).
+    An isolated vertex can never be covered, the answer is then immediately no.
+    A graph with a single component goes to the solver unchanged.
+
+    Returns:
+        - bool: Whether a solution was found (the covers of the components add up to at most k edges)
+        - Set[int]: The union of the component covers if found, empty set otherwise (when the
+          deadline expires, the union of what the components returned)
+        - int: The work of the solver (decisions made or configurations tested) summed over the components
+
+    Basic Operations Count (recorded in counter):
+    see connected_components, plus the ones of the solver on every component
+    """
+    deadline = deadline or Deadline()
+    counter = counter or NULL_COUNTER
+    components = connected_components(graph, counter)
+    if len(components) <= 1:
+        return solver(graph, nr_edge_cover, deadline=deadline, counter=counter)
+    if any(len(vertices) == 1 for vertices in components):
+        return False, set(), 0
+
+    lower_bounds = [(len(vertices) + 1) // 2 for vertices in components]
+    slack = nr_edge_cover - sum(lower_bounds)
+    if slack < 0:
+        return False, set(), 0
+
+    subgraphs = [induced_subgraph(graph, vertices) for vertices in components]
+    budgets = [(lower, min(lower + slack, subgraph.num_edges)) for lower, (subgraph, _) in zip(lower_bounds, subgraphs)]
+    big = [i for i, (subgraph, _) in enumerate(subgraphs) if subgraph.num_edges >= PARALLEL_MIN_EDGES]
+    workers = min(workers or os.cpu_count() or 1, len(big))
+    if multiprocessing.current_process().daemon:
+        # daemon processes (the workers of experiment.py) cannot start processes
+        workers = 1
+
+    answers: Dict[int, Tuple[bool, Set[int], int]] = {}
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        pending = {}
+        if pool is not None:
+            pending = {i: pool.apply_async(component_worker, (solver, subgraphs[i][0], *budgets[i], smallest_first, deadline))
+                       for i in big}
+        for i, (subgraph, _) in enumerate(subgraphs):
+            if i not in pending:
+                answers[i] = solve_component(solver, subgraph, *budgets[i], smallest_first, deadline, counter)
+        for i, result in pending.items():
+            success, edge_cover, work, counts, reached = result.get()
+            counter.record(**counts)
+            # the workers have their own copy of the deadline
+            deadline.reached = deadline.reached or reached
+            answers[i] = (success, edge_cover, work)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    work = sum(answers[i][2] for i in range(len(subgraphs)))
+    edge_cover = {edges[edge] for i, (_, edges) in enumerate(subgraphs) for edge in answers[i][1]}
+    success = all(answers[i][0] for i in range(len(subgraphs))) and len(edge_cover) <= nr_edge_cover
+    if success:
+        return True, edge_cover, work
+    return False, edge_cover if deadline.reached else set(), work
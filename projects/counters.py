@@ -0,0 +1,38 @@
+from typing import Dict
+
+
+""" OPERATION COUNTERS """
+
+class OperationCounter:
+    """
+    Named counts of the basic operations a search performed (edge reads, set inserts,
+    random draws, ...). The searches keep plain local tallies in their loops (integer
+    additions, made with or without a counter) and record them once when they return, so
+    the counter itself costs nothing in the loops. Where a tally would be the only work of
+    an inner loop (the set based exhaustive check), it is derived from the outer counts
+    instead, or only kept when a real counter is given.
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+
+    def record(self, **tallies: int):
+        for name, amount in tallies.items():
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def merge(self, other: 'OperationCounter'):
+        self.record(**other.counts)
+
+    def total(self) -> int:
+        """Basic operations count: every counted operation costs one."""
+        return sum(self.counts.values())
+
+
+class NullCounter(OperationCounter):
+    """Counter used when counting is disabled, recording does nothing."""
+
+    def record(self, **tallies: int):
+        pass
+
+
+NULL_COUNTER = NullCounter()
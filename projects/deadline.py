@@ -0,0 +1,36 @@
+import time
+from typing import Optional
+
+
+""" DEADLINES """
+
+class Deadline:
+    """
+    Cooperative time limit for the searches.
+    The find_edge_cover_* functions call expired() in their loops and, once it returns
+    True, stop and return the best answer found so far with their counters up to that point.
+    cancel() stops a search from another thread before the time is up. Worker processes
+    started by a search share the time limit (the clock is the same) but not cancel().
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.end = None if seconds is None else time.monotonic() + seconds
+        self.cancelled = False
+        # set once expired() returned True, so the caller knows the answer may be partial
+        self.reached = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def expired(self) -> bool:
+        if not self.reached and (self.cancelled or (self.end is not None and time.monotonic() >= self.end)):
+            self.reached = True
+        return self.reached
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, None without a time limit."""
+        return None if self.end is None else max(0.0, self.end - time.monotonic())
+
+
+# expired() is only called once every CHECK_INTERVAL iterations of the inner loops
+CHECK_INTERVAL = 1024
@@ -1,147 +1,817 @@
 import itertools
 import json
+import multiprocessing
+import os
 import sys
 import time
-from typing import Dict, List, Set, Tuple
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
 import math
 
+from bounds import FeasibilityBounds, resolve_all_by_bounds, resolve_by_bounds
+from components import find_edge_cover_by_components
+from counters import NULL_COUNTER, OperationCounter
+from deadline import CHECK_INTERVAL, Deadline
+from graph import Graph, file_digest
+from graph_cache import load_graph_cached
+from kernel import find_edge_cover_kernelized
+from results_store import append_result
 
-""" HELP FUNCTIONS """
 
-def load_graph(filename: str) -> Dict[str, List[str]]:
-    """Load graph from JSON file."""
-    with open(filename, 'r') as f:
-        return json.load(f)
+# rank ranges per worker process of the sharded search, more ranges balance the work better
+SHARDS_PER_WORKER = 4
 
-def get_all_edges(graph: Dict[str, List[str]]) -> List[Tuple[str, str]]:
-    """Get all edges from the graph."""
-    edges = set()
-    for vertex, neighbors in graph.items():
-        for neighbor in neighbors:
-            # Ensure consistent ordering of vertices in edge
-            edge = tuple(sorted([vertex, neighbor]))
-            edges.add(edge)
-    return list(edges)
+# the resumable search saves its progress this often (seconds), in CHECKPOINTS_FOLDER
+CHECKPOINT_SECONDS = 10
+CHECKPOINTS_FOLDER = 'results/checkpoints'
 
 
 """ ALGORITHM FUNCTIONS """
 
-def is_valid_edge_cover(graph: Dict[str, List[str]], edge_set: Set[Tuple[str, str]]) -> bool:
+def is_valid_edge_cover(graph: Graph, edge_set: Set[int], counter: Optional[OperationCounter] = None) -> bool:
     """
     Check if the given  set is a valid edge cover.
     An edge cover must incluedgede at least one edge incident to each vertex.
 
-    Basic Operations Count:
-    1 + 3*len(edge_set) + 2*len(graph)
+    Basic Operations Count (recorded in counter, tallied only when one is given):
+    2 endpoint reads and 2 set inserts per edge, and 1 size check
     """
 
     covered_vertices = set()
     
-    # Add all vertices that are incident to edges in the edge set
-    for edge in edge_set: 
-        covered_vertices.add(edge[0])
-        covered_vertices.add(edge[1])
+    if counter is None or counter is NULL_COUNTER:
+        # Add all vertices that are incident to edges in the edge set
+        for edge in edge_set: 
+            covered_vertices.add(graph.edge_u[edge])
+            covered_vertices.add(graph.edge_v[edge])
+    else:
+        endpoint_reads = 0
+        set_inserts = 0
+        for edge in edge_set:
+            covered_vertices.add(graph.edge_u[edge])
+            covered_vertices.add(graph.edge_v[edge])
+            endpoint_reads += 2
+            set_inserts += 2
+        counter.record(endpoint_reads=endpoint_reads, set_inserts=set_inserts, size_checks=1)
     
     # Check if all vertices in the graph are covered
-    for vertex in graph.keys():
-        if vertex not in covered_vertices:
-            return False
-            
-    return True
+    return len(covered_vertices) == graph.num_vertices
 
-def find_edge_cover_exhaustive(graph: Dict[str, List[str]] , edges: List[Tuple[str, str]], nr_edge_cover: int) -> Tuple[bool, Set[Tuple[str, str]], int]:
+def find_edge_cover_exhaustive(graph: Graph, nr_edge_cover: int, deadline: Optional[Deadline] = None,
+                               counter: Optional[OperationCounter] = None) -> Tuple[bool, Set[int], int]:
     """
     Find an edge cover of size k using exhaustive search.
+    When the deadline expires the search stops with no cover and the configurations tested so far.
     Returns:
         - bool: Whether a solution was found
-        - Set[Tuple[str, str]]: The edge cover if found, empty set otherwise
+        - Set[int]: The edge ids of the cover if found, empty set otherwise
         - int: Number of configurations tested
 
 
-    Basic Operations Count (dentro do for):
-    3 + is_valid_edge_cover ==
-    3 + 1 + 3*len(edge_set) + 2*len(graph) ==
-    4 + 3*len(nr_edge_cover) + 2*len(graph)
+    Basic Operations Count (per configuration, recorded in counter):
+    k set inserts to build the edge set, then the ones of is_valid_edge_cover. Every
+    configuration has exactly k edges and the check scans all of them, so the tallies
+    follow from the configurations tested and the loop does not count anything
     """
+    deadline = deadline or Deadline()
+    counter = counter or NULL_COUNTER
     configs_tested = 0
+    found = None
     
     # Try all possible combinations of k edges
-    for edge_combination in itertools.combinations(edges, nr_edge_cover):
+    for edge_combination in itertools.combinations(range(graph.num_edges), nr_edge_cover):
+        if configs_tested % CHECK_INTERVAL == 0 and deadline.expired():
+            break
         configs_tested += 1
         edge_set = set(edge_combination)
         
         if is_valid_edge_cover(graph, edge_set):
-            return True, edge_set, configs_tested
-    
+            found = edge_set
+            break
+
+    edges_scanned = nr_edge_cover * configs_tested
+    counter.record(set_inserts=edges_scanned + 2 * edges_scanned, endpoint_reads=2 * edges_scanned,
+                   size_checks=configs_tested)
+    if found is not None:
+        return True, found, configs_tested
     return False, set(), configs_tested
 
-""" ANALYSIS FUNCTIONS """
+def edge_masks(graph: Graph) -> List[int]:
+    """Vertex bitmask of every edge, bit v is set when the edge touches vertex v."""
+    return [(1 << graph.edge_u[edge]) | (1 << graph.edge_v[edge]) for edge in range(graph.num_edges)]
 
-def set_variables_and_analyze_performance(filename: str, k: float, edge_cover_save_solution: bool):
-    # Load the graph
-    graph = load_graph(filename)
+def find_edge_cover_exhaustive_bitmask(graph: Graph, nr_edge_cover: int, deadline: Optional[Deadline] = None,
+                                       counter: Optional[OperationCounter] = None) -> Tuple[bool, Set[int], int]:
+    """
+    Same search as find_edge_cover_exhaustive (same combinations, same order, same
+    configurations count) but every combination is checked by OR-ing edge bitmasks.
 
-    edges = get_all_edges(graph)
+    prefix[i] keeps the OR of the first i chosen edges, so moving to the next combination
+    only recomputes the positions that changed. When a prefix leaves more vertices
+    uncovered than the remaining edges can cover (2 per edge), none of its completions
+    can be a cover, so all of them are counted as tested at once with math.comb.
+    When the deadline expires the search stops with no cover and the configurations tested so far.
 
-    nr_edge_cover = int(len(edges) * k)
+    Returns:
+        - bool: Whether a solution was found
+        - Set[int]: The edge ids of the cover if found, empty set otherwise
+        - int: Number of configurations tested
 
-    start_time = time.time()
-    # Run the algorithm
-    success, edge_cover, configs_tested = find_edge_cover_exhaustive(graph, edges, nr_edge_cover)
+    Basic Operations Count (recorded in counter):
+    1 mask per edge, 1 OR and 1 compare per configuration tested one by one, 1 OR per prefix extension,
+    1 popcount per prefix checked, the configurations counted with math.comb cost nothing
+    """
+    nr_edges = graph.num_edges
+    k = nr_edge_cover
+    all_vertices = (1 << graph.num_vertices) - 1
+
+    if k > nr_edges:
+        return False, set(), 0
+    if k == 0:
+        return all_vertices == 0, set(), 1
+
+    deadline = deadline or Deadline()
+    counter = counter or NULL_COUNTER
+    masks = edge_masks(graph)
+    configs_tested = 0
+    steps = 0
+    # local tallies, recorded in counter when the search returns
+    checked = 0
+    extensions = 0
+    popcounts = 0
 
-    execution_time = time.time() - start_time
+    indices = [0] * k
+    prefix = [0] * k
+    i = 0
 
-    # Basic Operations Count:
-    # ( This number is counted in the alforithm functions, if you change the algorithm you must change this number )
-    basic_operations_count = configs_tested * 4 + 3*nr_edge_cover + 2*len(graph)
+    try:
+        while True:
+            steps += 1
+            if steps % CHECK_INTERVAL == 0 and deadline.expired():
+                return False, set(), configs_tested
+
+            if i == k - 1:
+                # sweep the last position with the first k-1 edges fixed
+                fixed = prefix[i]
+                popcounts += 1
+                if bin(all_vertices & ~fixed).count('1') > 2:
+                    configs_tested += nr_edges - indices[i]
+                else:
+                    start = configs_tested
+                    for last in range(indices[i], nr_edges):
+                        configs_tested += 1
+                        if fixed | masks[last] == all_vertices:
+                            checked += configs_tested - start
+                            indices[i] = last
+                            return True, set(indices), configs_tested
+                    checked += configs_tested - start
+                indices[i] = nr_edges
+
+            if indices[i] > nr_edges - k + i:
+                # every choice for position i was tried, move the previous position
+                i -= 1
+                if i < 0:
+                    return False, set(), configs_tested
+                indices[i] += 1
+                continue
+
+            covered = prefix[i] | masks[indices[i]]
+            remaining = k - i - 1
+            extensions += 1
+            popcounts += 1
+            if bin(all_vertices & ~covered).count('1') > 2 * remaining:
+                configs_tested += math.comb(nr_edges - indices[i] - 1, remaining)
+                indices[i] += 1
+                continue
+
+            prefix[i + 1] = covered
+            indices[i + 1] = indices[i] + 1
+            i += 1
+    finally:
+        counter.record(mask_builds=nr_edges, bitmask_ors=checked + extensions, mask_compares=checked, popcounts=popcounts)
+
+def pad_edge_cover(graph: Graph, edge_cover: Set[int], nr_edge_cover: int) -> Set[int]:
+    """Add unused edges (lowest ids first) until the cover has exactly nr_edge_cover edges."""
+    padded = set(edge_cover)
+    edge = 0
+    while len(padded) < nr_edge_cover:
+        padded.add(edge)
+        edge += 1
+    return padded
+
+def find_edge_cover_branch_and_bound(graph: Graph, nr_edge_cover: int, deadline: Optional[Deadline] = None,
+                                     counter: Optional[OperationCounter] = None) -> Tuple[bool, Set[int], int]:
+    """
+    Exact search for an edge cover of size k using depth first branch and bound.
+
+    Each node branches on the uncovered vertex with the fewest candidate edges, one branch
+    per candidate (edges covering two uncovered vertices first). Edges tried in earlier
+    branches are forbidden in the later ones, so every edge set is reached at most once.
+    A node is pruned when the edges left in the budget cannot cover the uncovered vertices
+    (budget < ceil(uncovered / 2)) or some uncovered vertex has no candidate left.
+    A cover found with fewer than k edges is padded with unused edges, like the
+    exhaustive search the result always has exactly k edges.
+    When the deadline expires the search stops with no cover and the nodes visited so far.
 
-    write_results_to_file(filename, k, success, edge_cover, configs_tested, execution_time, basic_operations_count, edge_cover_save_solution)
+    Returns:
+        - bool: Whether a solution was found
+        - Set[int]: The edge ids of the cover if found, empty set otherwise
+        - int: Number of configurations tested (search nodes visited)
 
+    Basic Operations Count (recorded in counter):
+    1 mask per edge, 1 popcount per node, 1 forbidden check per incident edge scanned while choosing the
+    branching vertex and per candidate collected, 1 OR per branch taken
+    """
+    if nr_edge_cover > graph.num_edges:
+        return False, set(), 0
+
+    deadline = deadline or Deadline()
+    counter = counter or NULL_COUNTER
+    all_vertices = (1 << graph.num_vertices) - 1
+    masks = edge_masks(graph)
+    forbidden = [False] * graph.num_edges
+    chosen: List[int] = []
+    configs_tested = 0
+    # local tallies, recorded in counter when the search returns
+    scanned = 0
+    branches = 0
 
+    # frames of (candidate edges, next candidate position, covered vertices before branching)
+    stack: List[Tuple[List[int], int, int]] = []
+    covered = 0
 
-def write_results_to_file(graph_filename: str, k: int, success: bool, edge_cover: Set[Tuple[str, str]], configs_tested: int, execution_time: float, basic_operations_count: int, edge_cover_save_solution: bool):
-    
-    results_filename = 'results/exhaustive_search_results.json'
-    
     try:
-        with open(results_filename, 'r') as f:
-            results = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        results = {}
+        while True:
+            if configs_tested % CHECK_INTERVAL == 0 and deadline.expired():
+                return False, set(), configs_tested
+            configs_tested += 1
+            uncovered = all_vertices & ~covered
+
+            if uncovered == 0:
+                return True, pad_edge_cover(graph, set(chosen), nr_edge_cover), configs_tested
+
+            candidates: List[int] = []
+            if bin(uncovered).count('1') <= 2 * (nr_edge_cover - len(chosen)):
+                best_vertex, best_count = -1, graph.num_edges + 1
+                pending = uncovered
+                while pending:
+                    lowest = pending & -pending
+                    vertex = lowest.bit_length() - 1
+                    pending ^= lowest
+                    count = sum(1 for edge in graph.incident(vertex) if not forbidden[edge])
+                    scanned += graph.degree(vertex)
+                    if count < best_count:
+                        best_vertex, best_count = vertex, count
+                        if count == 0:
+                            break
+
+                if best_count > 0:
+                    candidates = [edge for edge in graph.incident(best_vertex) if not forbidden[edge]]
+                    scanned += graph.degree(best_vertex)
+                    # edges that also cover the other endpoint first
+                    candidates.sort(key=lambda edge: (masks[edge] & uncovered) != masks[edge])
+
+            stack.append((candidates, 0, covered))
+
+            # go to the next unexplored branch, backtracking through finished nodes
+            while stack:
+                candidates, position, covered_before = stack[-1]
+                if position > 0:
+                    chosen.pop()
+                    forbidden[candidates[position - 1]] = True
+                if position < len(candidates):
+                    edge = candidates[position]
+                    stack[-1] = (candidates, position + 1, covered_before)
+                    chosen.append(edge)
+                    covered = covered_before | masks[edge]
+                    branches += 1
+                    break
+                for edge in candidates:
+                    forbidden[edge] = False
+                stack.pop()
+            else:
+                return False, set(), configs_tested
+    finally:
+        counter.record(mask_builds=graph.num_edges, popcounts=configs_tested, forbidden_checks=scanned, bitmask_ors=branches)
+
+def exhaustive_size_trials(graph: Graph, max_size: int, deadline: Optional[Deadline] = None) -> Tuple[Optional[Set[int]], List[Tuple[int, int, Dict[str, int]]]]:
+    """
+    Run find_edge_cover_exhaustive_bitmask for every size from ceil(n/2) (the fewest edges
+    that can cover n vertices) up to max_size, stopping at the first size with a cover,
+    which is then a minimum edge cover. Stops early when the deadline expires.
+    Returns the minimum cover (None if there is none up to max_size) and the
+    (size, configurations tested, operation counts) of every size searched.
+    """
+    deadline = deadline or Deadline()
+    trials = []
+    for size in range((graph.num_vertices + 1) // 2, min(max_size, graph.num_edges) + 1):
+        counter = OperationCounter()
+        success, edge_cover, configs_tested = find_edge_cover_exhaustive_bitmask(graph, size, deadline, counter)
+        trials.append((size, configs_tested, counter.counts))
+        if success:
+            return edge_cover, trials
+        if deadline.reached:
+            break
+    return None, trials
+
+def answer_from_size_trials(graph: Graph, nr_edge_cover: int, edge_cover: Optional[Set[int]],
+                            trials: List[Tuple[int, int, Dict[str, int]]],
+                            counter: OperationCounter) -> Tuple[bool, Set[int], int]:
+    """Answer for budget nr_edge_cover from exhaustive_size_trials, counting only the sizes up to nr_edge_cover."""
+    configs_tested = 0
+    for size, size_configs, counts in trials:
+        if size <= nr_edge_cover:
+            configs_tested += size_configs
+            counter.record(**counts)
+    if edge_cover is None or len(edge_cover) > nr_edge_cover or nr_edge_cover > graph.num_edges:
+        return False, set(), configs_tested
+    return True, pad_edge_cover(graph, edge_cover, nr_edge_cover), configs_tested
+
+def find_edge_cover_exhaustive_smallest_first(graph: Graph, nr_edge_cover: int, deadline: Optional[Deadline] = None,
+                                              counter: Optional[OperationCounter] = None) -> Tuple[bool, Set[int], int]:
+    """
+    Same answer as find_edge_cover_exhaustive_bitmask, but the sizes are searched from
+    ceil(n/2) up (see exhaustive_size_trials) and the first cover found, a minimum one, is
+    padded to k edges. A cover of k edges exists exactly when a minimum one has at most
+    k edges, and the small sizes have far fewer combinations than C(E, k) for large k.
+    When the deadline expires the search stops with no cover and the configurations tested so far.
+
+    Returns:
+        - bool: Whether a solution was found
+        - Set[int]: The edge ids of the cover if found, empty set otherwise
+        - int: Number of configurations tested (summed over the sizes searched)
+
+    Basic Operations Count (recorded in counter):
+    the ones of find_edge_cover_exhaustive_bitmask for every size searched
+    """
+    edge_cover, trials = exhaustive_size_trials(graph, nr_edge_cover, deadline)
+    return answer_from_size_trials(graph, nr_edge_cover, edge_cover, trials, counter or NULL_COUNTER)
 
-    if graph_filename not in results:
-        results[graph_filename] = []
+def unrank_combination(rank: int, n: int, k: int) -> List[int]:
+    """
+    Combination of k of range(n) at position rank of the lexicographic order of
+    itertools.combinations(range(n), k), without enumerating the ones before it.
+    """
+    combination = []
+    item = 0
+    for position in range(k):
+        # skip the items whose block of combinations lies entirely before rank
+        while True:
+            block = math.comb(n - item - 1, k - position - 1)
+            if rank < block:
+                break
+            rank -= block
+            item += 1
+        combination.append(item)
+        item += 1
+    return combination
+
+def rank_combination(combination: List[int], n: int) -> int:
+    """Position of combination in the lexicographic order (inverse of unrank_combination)."""
+    k = len(combination)
+    rank = 0
+    previous = -1
+    for position, item in enumerate(combination):
+        for skipped in range(previous + 1, item):
+            rank += math.comb(n - skipped - 1, k - position - 1)
+        previous = item
+    return rank
+
+def search_combination_range(masks: List[int], all_vertices: int, k: int, start: int, end: int,
+                             deadline: Deadline, best_shard=None, shard: int = 0) -> Tuple[Optional[int], List[int], int, Dict[str, int]]:
+    """
+    The bitmask search (find_edge_cover_exhaustive_bitmask) over the combinations with rank in
+    start..end-1 only, in the same order. A prefix that leaves more vertices uncovered than the
+    remaining edges can cover skips the rest of its combinations at once, up to end (the next
+    range counts the ones after it). Stops at the first cover, when the deadline expires or
+    when best_shard (shared between workers) holds the index of a range before this one (shard)
+    where a cover was found.
+    Returns the rank of the cover found (None if none), the cover, the configurations tested
+    (ranks covered, counted once over all the ranges) and the operation counts.
+    """
+    nr_edges = len(masks)
+    if k == 0:
+        # the only combination is the empty one, a cover when there is no vertex
+        return (start if all_vertices == 0 else None), [], end - start, {}
+    indices = unrank_combination(start, nr_edges, k)
+    prefix = [0] * (k + 1)
+    rank = start
+    # prefixes below position valid are up to date
+    valid = 0
+    steps = 0
+    ors = 0
+    popcounts = 0
+
+    def tested() -> int:
+        return min(rank, end) - start
+
+    def counts() -> Dict[str, int]:
+        return {'bitmask_ors': ors, 'popcounts': popcounts}
+
+    while rank < end:
+        steps += 1
+        if steps % CHECK_INTERVAL == 0 and (deadline.expired() or (best_shard is not None and best_shard.value < shard)):
+            break
+
+        i = valid
+        pruned = False
+        while i < k - 1:
+            covered = prefix[i] | masks[indices[i]]
+            ors += 1
+            popcounts += 1
+            remaining = k - i - 1
+            if bin(all_vertices & ~covered).count('1') > 2 * remaining:
+                pruned = True
+                break
+            prefix[i + 1] = covered
+            i += 1
+
+        if pruned:
+            # no completion of indices[0..i] is a cover, skip the rest of them
+            if indices[k - 1] == indices[i] + remaining:
+                rank += math.comb(nr_edges - indices[i] - 1, remaining)
+            else:
+                # only the first combination of a range starts in the middle of a prefix
+                tail = [index - indices[i] - 1 for index in indices[i + 1:]]
+                rank += math.comb(nr_edges - indices[i] - 1, remaining) - rank_combination(tail, nr_edges - indices[i] - 1)
+        else:
+            # sweep the last position with the first k-1 edges fixed (one rank per edge), up to end
+            fixed = prefix[i]
+            first = indices[i]
+            last_end = min(nr_edges, first + end - rank)
+            for last in range(first, last_end):
+                if fixed | masks[last] == all_vertices:
+                    ors += last - first + 1
+                    rank += last - first
+                    indices[i] = last
+                    return rank, list(indices), tested() + 1, counts()
+            ors += last_end - first
+            rank += last_end - first
+            indices[i] = nr_edges - 1
+
+        # next prefix: move position i (or an earlier one) and reset the later positions
+        while i >= 0 and indices[i] >= nr_edges - k + i:
+            i -= 1
+        if i < 0:
+            break
+        indices[i] += 1
+        for position in range(i + 1, k):
+            indices[position] = indices[position - 1] + 1
+        valid = i
+
+    return None, [], tested(), counts()
+
+def exhaustive_shard_worker(graph: Graph, k: int, shards: List[Tuple[int, int]], worker: int, workers: int,
+                            best_shard, results, deadline: Deadline):
+    """
+    Searches the shards worker, worker + workers, ... (rank ranges, in order) until one has a
+    cover or a cover was found in a lower shard by another worker (best_shard, shared). The
+    index of the shard is shared, not the rank: C(E, k) quickly outgrows a 64 bit integer.
+    Puts the (rank of the cover or None, cover, configurations tested, operation counts) of
+    every shard it searched and whether it stopped at the deadline in results.
+    """
+    masks = edge_masks(graph)
+    all_vertices = (1 << graph.num_vertices) - 1
+    outcomes = []
+    for shard in range(worker, len(shards), workers):
+        start, end = shards[shard]
+        if shard > best_shard.value or deadline.expired():
+            break
+        found, edge_cover, configs_tested, counts = search_combination_range(masks, all_vertices, k, start, end, deadline,
+                                                                             best_shard, shard)
+        outcomes.append((found, edge_cover, configs_tested, counts))
+        if found is not None:
+            with best_shard.get_lock():
+                best_shard.value = min(best_shard.value, shard)
+            break
+    results.put((outcomes, deadline.reached))
+
+def find_edge_cover_exhaustive_sharded(graph: Graph, nr_edge_cover: int, deadline: Optional[Deadline] = None,
+                                       counter: Optional[OperationCounter] = None,
+                                       workers: Optional[int] = None) -> Tuple[bool, Set[int], int]:
+    """
+    find_edge_cover_exhaustive_bitmask with the C(E, k) combinations split into contiguous
+    rank ranges (SHARDS_PER_WORKER per worker process), each one started by unranking its
+    first combination. The answer is the cover with the lowest rank, the one the sequential
+    search finds, so its configurations tested (rank + 1) are exact too. A worker stops as soon
+    as a cover is found in a range before the one it searches (the workers with lower ranges
+    go on, a cover there would come first).
+    When the deadline expires the search stops with no cover and the configurations tested so far.
+
+    Returns:
+        - bool: Whether a solution was found
+        - Set[int]: The edge ids of the cover if found, empty set otherwise
+        - int: Number of configurations tested
 
+    Basic Operations Count (recorded in counter):
+    1 mask per edge per worker, 1 OR and 1 popcount per prefix checked by every worker
+    (including the ranges searched past the cover)
+    """
+    nr_edges = graph.num_edges
+    if nr_edge_cover > nr_edges:
+        return False, set(), 0
+    deadline = deadline or Deadline()
+    counter = counter or NULL_COUNTER
+    total = math.comb(nr_edges, nr_edge_cover)
+    workers = min(workers or os.cpu_count() or 1, total)
+    if workers <= 1 or nr_edge_cover == 0 or multiprocessing.current_process().daemon:
+        # daemon processes (the workers of experiment.py) cannot start processes
+        return find_edge_cover_exhaustive_bitmask(graph, nr_edge_cover, deadline, counter)
+
+    count = min(workers * SHARDS_PER_WORKER, total)
+    bounds = [total * shard // count for shard in range(count + 1)]
+    shards = [(bounds[shard], bounds[shard + 1]) for shard in range(count)]
+
+    # the lowest range with a cover so far (count: none yet)
+    best_shard = multiprocessing.Value('q', count)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=exhaustive_shard_worker,
+                                args=(graph, nr_edge_cover, shards, worker, workers, best_shard, results, deadline))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    counter.record(mask_builds=nr_edges * workers)
+    for outcomes, _ in reports:
+        for _, _, _, counts in outcomes:
+            counter.record(**counts)
+    # the workers have their own copy of the deadline
+    deadline.reached = deadline.reached or any(reached for _, reached in reports)
+
+    covers = [(found, edge_cover) for outcomes, _ in reports for found, edge_cover, _, _ in outcomes if found is not None]
+    if covers:
+        found, edge_cover = min(covers)
+        return True, set(edge_cover), found + 1
+    return False, set(), sum(configs_tested for outcomes, _ in reports for _, _, configs_tested, _ in outcomes)
+
+""" CHECKPOINTS """
+
+def checkpoint_filename(graph_filename: str, k: float, folder: str = CHECKPOINTS_FOLDER) -> str:
+    """Checkpoint of the search of a graph for k, keyed by the contents of the graph file (not its path)."""
+    return os.path.join(folder, f"{file_digest(graph_filename)}_{k:g}.json")
+
+def load_checkpoint(filename: str, nr_edge_cover: int) -> Optional[Dict]:
+    """The saved state of a search for nr_edge_cover edges, None if there is none (or it is for another budget)."""
+    try:
+        with open(filename, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('nr_edge_cover') == nr_edge_cover else None
+
+def save_checkpoint(filename: str, state: Dict):
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    # write to a temporary file first, a run killed while writing keeps the previous checkpoint
+    temporary = f'{filename}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(state, f)
+    os.replace(temporary, filename)
+
+def find_edge_cover_exhaustive_resumable(graph: Graph, nr_edge_cover: int, deadline: Optional[Deadline] = None,
+                                         counter: Optional[OperationCounter] = None,
+                                         checkpoint: Optional[str] = None) -> Tuple[bool, Set[int], int]:
+    """
+    find_edge_cover_exhaustive_bitmask that can stop and go on later: the combinations are
+    searched in order (search_combination_range) and every CHECKPOINT_SECONDS, and when the
+    deadline expires, the next rank to test (the configurations tested), the operation counts
+    and the time spent are saved to the checkpoint file. A search started with an existing
+    checkpoint goes on from its rank with its counts, so the configurations tested and the
+    cover are the ones of a single uninterrupted search. The checkpoint is removed once
+    the search ends.
+
+    Returns:
+        - bool: Whether a solution was found
+        - Set[int]: The edge ids of the cover if found, empty set otherwise
+        - int: Number of configurations tested (including the ones of the runs before)
+
+    Basic Operations Count (recorded in counter):
+    the ones of search_combination_range over every run (1 mask per edge per run)
+    """
+    nr_edges = graph.num_edges
+    if nr_edge_cover > nr_edges:
+        return False, set(), 0
+    if nr_edge_cover == 0:
+        return graph.num_vertices == 0, set(), 1
+    deadline = deadline or Deadline()
+    counter = counter or NULL_COUNTER
+    state = (load_checkpoint(checkpoint, nr_edge_cover) if checkpoint else None) or \
+        {'nr_edge_cover': nr_edge_cover, 'rank': 0, 'operation_counts': {}, 'elapsed': 0.0}
+    # the counts of the previous runs go on too, recorded in counter when the search returns
+    counts = OperationCounter()
+    counts.record(**state['operation_counts'])
+    counts.record(mask_builds=nr_edges)
+    masks = edge_masks(graph)
+    all_vertices = (1 << graph.num_vertices) - 1
+    total = math.comb(nr_edges, nr_edge_cover)
+    # every combination before rank was tested, by this run or the ones before
+    rank = state['rank']
+    start_time = time.time()
+
+    found = None
+    try:
+        while rank < total and found is None:
+            remaining = deadline.remaining()
+            piece = Deadline(CHECKPOINT_SECONDS if remaining is None else min(CHECKPOINT_SECONDS, remaining))
+            found, edge_cover, tested, piece_counts = search_combination_range(masks, all_vertices, nr_edge_cover, rank, total, piece)
+            rank += tested
+            counts.record(**piece_counts)
+            if found is None and checkpoint:
+                save_checkpoint(checkpoint, {'nr_edge_cover': nr_edge_cover, 'rank': rank, 'operation_counts': counts.counts,
+                                             'elapsed': state['elapsed'] + time.time() - start_time})
+            if found is None and deadline.expired():
+                return False, set(), rank
+    finally:
+        counter.merge(counts)
+
+    # the search ended, the next run starts over
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    if found is not None:
+        # the combinations before the cover and the cover itself
+        return True, set(edge_cover), found + 1
+    return False, set(), total
+
+EXHAUSTIVE_METHODS = {
+    'set': find_edge_cover_exhaustive,
+    'bitmask': find_edge_cover_exhaustive_bitmask,
+    'branch_and_bound': find_edge_cover_branch_and_bound,
+    'smallest_first': find_edge_cover_exhaustive_smallest_first,
+    'sharded': find_edge_cover_exhaustive_sharded,
+}
+
+def exhaustive_solver(method: str, components: bool = False, kernelize: bool = False):
+    """
+    The search of method, on every connected component separately with components
+    and on the kernel of the graph with kernelize (components inside the kernel).
+    """
+    solver = EXHAUSTIVE_METHODS[method]
+    if components:
+        # every component is searched from its smallest possible cover up, with smallest_first
+        # itself a component would get a cover padded to its whole budget
+        if method == 'smallest_first':
+            solver = find_edge_cover_exhaustive_bitmask
+        solver = partial(find_edge_cover_by_components, solver=solver, smallest_first=True)
+    if kernelize:
+        solver = partial(find_edge_cover_kernelized, solver=solver)
+    return solver
+
+""" ANALYSIS FUNCTIONS """
+
+def set_variables_and_analyze_performance(filename: str, k: float, edge_cover_save_solution: bool, method: str = 'bitmask',
+                                          graph: Optional[Graph] = None, time_limit: Optional[float] = None,
+                                          components: bool = False, kernelize: bool = False, bounds: bool = True,
+                                          checkpoint: bool = False) -> bool:
+    """
+    Run the search for one k and store the result. Returns whether it stopped at the time limit.
+    With components every connected component is searched on its own (from its smallest
+    possible cover up), with kernelize the search runs on the kernel of the graph (see kernel.py).
+    The cover is then padded to k edges like the search of the whole graph.
+    Unless bounds is False, a k settled by FeasibilityBounds (bounds.py) is answered without a search.
+    With checkpoint the bitmask search (alone, without components or kernelize) saves its
+    progress in CHECKPOINTS_FOLDER and goes on from a previous run stopped by the time limit
+    or killed, the time of the previous runs is added to the execution time.
+    """
+    # Load the graph (unless the caller already has it loaded)
+    if graph is None:
+        graph = load_graph_cached(filename)
+
+    nr_edge_cover = int(graph.num_edges * k)
+    deadline = Deadline(time_limit)
+    counter = OperationCounter()
+
+    start_time = time.time()
+    answer = resolve_by_bounds(FeasibilityBounds(graph, counter), nr_edge_cover) if bounds else None
+    resolved_by = 'search' if answer is None else 'bound'
+    previous_time = 0.0
+    resumed = False
+    if answer is None:
+        # Run the algorithm
+        if checkpoint and method == 'bitmask' and not components and not kernelize:
+            checkpoint_file = checkpoint_filename(filename, k)
+            state = load_checkpoint(checkpoint_file, nr_edge_cover)
+            if state is not None:
+                resumed = True
+                previous_time = state['elapsed']
+            solver = partial(find_edge_cover_exhaustive_resumable, checkpoint=checkpoint_file)
+        else:
+            solver = exhaustive_solver(method, components, kernelize)
+        answer = solver(graph, nr_edge_cover, deadline=deadline, counter=counter)
+    success, edge_cover, configs_tested = answer
+    if success and (components or kernelize or resolved_by == 'bound'):
+        edge_cover = pad_edge_cover(graph, edge_cover, nr_edge_cover)
+
+    execution_time = previous_time + time.time() - start_time
+
+    # Basic Operations Count:
+    # ( counted by the algorithm functions themselves, see the Basic Operations Count of each one )
+    basic_operations_count = counter.total()
+
+    write_results_to_file(filename, k, success, graph.edge_labels(edge_cover), configs_tested, execution_time, basic_operations_count, edge_cover_save_solution, deadline.reached, counter.counts, components, kernelize, resolved_by, resumed)
+    return deadline.reached
+
+def analyze_performance_multi_k(filename: str, kvalues: List[float], edge_cover_save_solution: bool, bounds: bool = True):
+    """
+    Same results as set_variables_and_analyze_performance with method smallest_first for every k,
+    loading once and searching the sizes once: the minimum cover found for the largest k
+    answers every smaller one.
+    """
+    graph = load_graph_cached(filename)
+    nr_edge_covers = [int(graph.num_edges * k) for k in kvalues]
+
+    start_time = time.time()
+    bounds_counter = OperationCounter()
+    answers = resolve_all_by_bounds(graph, nr_edge_covers, bounds_counter) if bounds else [None] * len(kvalues)
+    resolved_by = ['search' if answer is None else 'bound' for answer in answers]
+    counters = [OperationCounter() for _ in kvalues]
+    for counter in counters:
+        counter.merge(bounds_counter)
+    # a k settled by the bounds takes only the time of the bounds
+    bounds_time = time.time() - start_time
+
+    searched = [i for i, answer in enumerate(answers) if answer is None]
+    if searched:
+        edge_cover, trials = exhaustive_size_trials(graph, max(nr_edge_covers[i] for i in searched))
+        for i in searched:
+            answers[i] = answer_from_size_trials(graph, nr_edge_covers[i], edge_cover, trials, counters[i])
+    # the shared search is the execution time of every searched k, flagged as shared_time
+    search_time = time.time() - start_time
+
+    for k, nr_edge_cover, (success, edge_cover, configs_tested), counter, resolved in zip(kvalues, nr_edge_covers, answers, counters, resolved_by):
+        if success and resolved == 'bound':
+            edge_cover = pad_edge_cover(graph, edge_cover, nr_edge_cover)
+        execution_time = bounds_time if resolved == 'bound' else search_time
+        basic_operations_count = counter.total()
+        write_results_to_file(filename, k, success, graph.edge_labels(edge_cover), configs_tested, execution_time, basic_operations_count, edge_cover_save_solution, operation_counts=counter.counts, resolved_by=resolved, shared_time=resolved == 'search' and len(searched) > 1)
+
+
+def write_results_to_file(graph_filename: str, k: int, success: bool, edge_cover: List[Tuple[str, str]], configs_tested: int, execution_time: float, basic_operations_count: int, edge_cover_save_solution: bool, timed_out: bool = False, operation_counts: Optional[Dict[str, int]] = None, components: bool = False, kernelized: bool = False, resolved_by: str = 'search', resumed: bool = False, shared_time: bool = False):
+    
     result_entry = {
         'k': k,
         'success': success,
         'configs_tested': configs_tested,
         'execution_time': execution_time,
-        'basic_operations_count': basic_operations_count
+        'basic_operations_count': basic_operations_count,
+        # 'bound' when FeasibilityBounds settled k without a search (bounds.py)
+        'resolved_by': resolved_by
     }
 
+    if operation_counts is not None:
+        # the basic operations count split by kind of operation
+        result_entry['operation_counts'] = dict(operation_counts)
+
+    if components:
+        # every connected component was solved separately (components.py)
+        result_entry['components'] = True
+
+    if kernelized:
+        # solved on the kernel of the graph, forced edges added back (kernel.py)
+        result_entry['kernelized'] = True
+
+    if resumed:
+        # went on from the checkpoint of a previous run, the counts and time include that run
+        result_entry['resumed'] = True
+
+    if shared_time:
+        # one run answered several k, the execution time is the time of that whole run
+        result_entry['shared_time'] = True
+
+    if timed_out:
+        # the search was stopped, success False only means no cover was found in time
+        result_entry['timed_out'] = True
+
     if edge_cover_save_solution:
         result_entry['edge_cover'] = list(edge_cover)
 
-    results[graph_filename].append(result_entry)
-
-    with open(results_filename, 'w') as f:
-        json.dump(results, f, indent=4)
+    append_result('exhaustive', graph_filename, result_entry)
 
 
 
 if __name__ == "__main__":
 
-    if len(sys.argv) < 2 or len(sys.argv) > 3:
-        print("Usage: python greedy_search.py <graph_file> [solution]")
+    if len(sys.argv) < 2 or len(sys.argv) > 7 or any(arg not in ("solution", "components", "kernel", "checkpoint") and arg not in EXHAUSTIVE_METHODS for arg in sys.argv[2:]):
+        print(f"Usage: python exhaustive_search.py <graph_file> [solution] [{'|'.join(EXHAUSTIVE_METHODS)}] [components] [kernel] [checkpoint]")
         sys.exit(1)
 
     graph_filename = sys.argv[1]
     
-    edge_cover_save_solution = len(sys.argv) == 3 and sys.argv[2] == "solution"
+    edge_cover_save_solution = "solution" in sys.argv[2:]
+    components = "components" in sys.argv[2:]
+    kernelize = "kernel" in sys.argv[2:]
+    checkpoint = "checkpoint" in sys.argv[2:]
+
+    method = next((arg for arg in sys.argv[2:] if arg in EXHAUSTIVE_METHODS), 'bitmask')
 
 
     kvalues = [0.125, 0.25, 0.5, 0.75]
 
-    for k in kvalues:
-        set_variables_and_analyze_performance(graph_filename, k, edge_cover_save_solution)
+    if method == 'smallest_first' and not components and not kernelize:
+        analyze_performance_multi_k(graph_filename, kvalues, edge_cover_save_solution)
+    else:
+        for k in kvalues:
+            set_variables_and_analyze_performance(graph_filename, k, edge_cover_save_solution, method, components=components, kernelize=kernelize, checkpoint=checkpoint)
@@ -1,7 +1,40 @@
-import sys
+import argparse
+import multiprocessing
 import os
 import time
-import subprocess
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Dict, List, Tuple
+
+import exhaustive_search
+import greedy_search
+import matching_search
+import randomized_search
+from bounds import FeasibilityBounds
+from graph import Graph
+from graph_cache import load_graph_cached
+from results_store import job_statuses, set_job_status
+
+
+ALGORITHMS = {
+    'exhaustive': exhaustive_search,
+    'greedy': greedy_search,
+    'randomized': randomized_search,
+    'matching': matching_search,
+}
+
+EDGE_PROBABILITY = [12, 25, 50, 75]
+KVALUES = [0.125, 0.25, 0.5, 0.75]
+
+# graphs kept loaded by every worker, jobs of the same graph are dispatched one after another
+GRAPH_CACHE_SIZE = 4
+
+# seconds a worker gets after the time limit to return its partial result before it is killed
+KILL_GRACE = 10
+
+# (graph filename, algorithm, k, density, vertices, time limit)
+Job = Tuple[str, str, float, int, int, float]
+
 
 def generate_graph(vertices):
     vertices = 4
@@ -9,60 +42,221 @@ def generate_graph(vertices):
         os.system(f"python3 graph_generator.py {vertices}")
         vertices += 1
 
+
+""" WORKERS """
+
+def experiment_worker(connection, options: Dict[str, bool]):
+    """
+    Runs the jobs received on connection in this process until it receives None.
+    The solvers write their results to the results store themselves, and stop at the
+    time limit of the job with their best answer so far. options are passed on to every
+    set_variables_and_analyze_performance (see algorithm_options).
+    """
+    graphs = {}
+    while True:
+        job = connection.recv()
+        if job is None:
+            return
+        graph_filename, algorithm, k = job[:3]
+        try:
+            if graph_filename not in graphs:
+                if len(graphs) >= GRAPH_CACHE_SIZE:
+                    graphs.pop(next(iter(graphs)))
+                graphs[graph_filename] = load_graph_cached(graph_filename)
+            timed_out = ALGORITHMS[algorithm].set_variables_and_analyze_performance(
+                graph_filename, k, False, graph=graphs[graph_filename], time_limit=job[5], **algorithm_options(algorithm, options))
+            connection.send(('timeout' if timed_out else 'done', job))
+        except Exception as error:
+            connection.send(('error', job, repr(error)))
+
+def algorithm_options(algorithm: str, options: Dict[str, bool]) -> Dict[str, bool]:
+    """
+    Keyword arguments of set_variables_and_analyze_performance for algorithm: components,
+    kernelize and bounds for every algorithm, checkpoint only for the exhaustive search.
+    """
+    return {name: value for name, value in options.items() if name != 'checkpoint' or algorithm == 'exhaustive'}
+
+def start_worker(options: Dict[str, bool]) -> Tuple[multiprocessing.Process, object]:
+    parent_connection, child_connection = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=experiment_worker, args=(child_connection, options), daemon=True)
+    process.start()
+    child_connection.close()
+    return process, parent_connection
+
+
+""" EXPERIMENT """
+
+def experiment_jobs(algorithms: List[str], retry: bool, timeout: float = None) -> List[Job]:
+    """Jobs of every existing graph file, skipping the ones already finished (or timed out, unless retry)."""
+    jobs = []
+    for algorithm in algorithms:
+        statuses = job_statuses(algorithm)
+        for probability in EDGE_PROBABILITY:
+            for vertices in range(4, 101):
+                graph_filename = f"graphs/graph_{str(vertices).zfill(3)}_{probability}.json"
+                if not os.path.exists(graph_filename):
+                    continue
+                for k in KVALUES:
+                    status = statuses.get((graph_filename, k))
+                    if status == 'done' or (status == 'timeout' and not retry):
+                        continue
+                    jobs.append((graph_filename, algorithm, k, probability, vertices, timeout))
+    # one graph after the other, so workers reuse the graphs they already loaded
+    jobs.sort(key=lambda job: (job[3], job[4], job[1], job[2]))
+    return jobs
+
+def stored_timeouts(algorithms: List[str]) -> Dict[Tuple[str, int, float], int]:
+    """(algorithm, density, k) -> smallest number of vertices of the jobs stored as timed out by a previous run."""
+    timed_out = {}
+    for algorithm in algorithms:
+        for (graph_filename, k), status in job_statuses(algorithm).items():
+            if status != 'timeout':
+                continue
+            name = os.path.splitext(os.path.basename(graph_filename))[0].split('_')
+            if len(name) != 3 or name[0] != 'graph' or not name[1].isdigit() or not name[2].isdigit():
+                continue
+            key = (algorithm, int(name[2]), k)
+            timed_out[key] = min(timed_out.get(key, int(name[1])), int(name[1]))
+    return timed_out
+
+def run_experiment(algorithms: List[str], workers: int = None, timeout: float = 60, retry: bool = False,
+                   components: bool = False, kernelize: bool = False, bounds: bool = True, checkpoint: bool = True):
+    """
+    Run every (graph, algorithm, k) job on a pool of worker processes.
+    A job stops at timeout seconds and stores its partial result, like the old sequential
+    sweep the bigger graphs of the same density (for that algorithm and k) are then skipped.
+    A worker that does not answer KILL_GRACE seconds later is killed and replaced.
+    Job statuses are kept in the results store, so running the experiment again resumes
+    where it stopped. Unless bounds is False, the jobs whose k FeasibilityBounds settles are
+    answered here (without a search) instead of being sent to a worker. Unless checkpoint
+    is False, the exhaustive search saves its progress, and a job that timed out goes on
+    from there when it is run again (with retry).
+    """
+    jobs = deque(experiment_jobs(algorithms, retry, timeout))
+    total = len(jobs)
+    workers = max(1, min(workers or os.cpu_count() or 1, total))
+    if total == 0:
+        print("Nothing to run, every job already has a result")
+        return
+
+    options = {'components': components, 'kernelize': kernelize, 'bounds': bounds, 'checkpoint': checkpoint}
+    pool = [start_worker(options) for _ in range(workers)]
+    running: Dict[int, Tuple[Job, float]] = {}
+    # (algorithm, density, k) -> smallest number of vertices that timed out, this run or a previous
+    # one (with retry the stored timeouts are jobs of this run again, only their new outcome counts)
+    timed_out: Dict[Tuple[str, int, float], int] = {} if retry else stored_timeouts(algorithms)
+    finished = 0
+    start_time = time.time()
+
+    def report(job: Job, status: str):
+        nonlocal finished
+        finished += 1
+        elapsed = time.time() - start_time
+        remaining = elapsed / finished * (total - finished)
+        print(f"[{finished}/{total}] {job[1]:<10} {job[0]} k={job[2]:<5} {status:<8} "
+              f"elapsed {elapsed:.1f}s, ~{remaining:.0f}s left", flush=True)
+
+    # graph filename -> (graph, bounds) of the last graphs checked, jobs of a graph come one after another
+    checked: Dict[str, Tuple[Graph, FeasibilityBounds]] = {}
+
+    def settled_by_bounds(job: Job) -> bool:
+        """Answer the job here when its k is settled by the bounds of the graph."""
+        if not bounds:
+            return False
+        if job[0] not in checked:
+            if len(checked) >= GRAPH_CACHE_SIZE:
+                checked.pop(next(iter(checked)))
+            graph = load_graph_cached(job[0])
+            checked[job[0]] = (graph, FeasibilityBounds(graph))
+        graph, graph_bounds = checked[job[0]]
+        if graph_bounds.check(int(graph.num_edges * job[2])) is None:
+            return False
+        ALGORITHMS[job[1]].set_variables_and_analyze_performance(job[0], job[2], False, graph=graph, time_limit=job[5], **algorithm_options(job[1], options))
+        set_job_status(job[0], job[1], job[2], 'done')
+        return True
+
+    def skipped(job: Job) -> bool:
+        limit = timed_out.get((job[1], job[3], job[2]))
+        return limit is not None and job[4] > limit
+
+    def record_timeout(job: Job):
+        set_job_status(job[0], job[1], job[2], 'timeout')
+        key = (job[1], job[3], job[2])
+        timed_out[key] = min(timed_out.get(key, job[4]), job[4])
+        print(f"Graph with {job[4]} vertices and {job[3]}% edges took more than {timeout:g}s to run ({job[1]}, k={job[2]})")
+        report(job, 'timeout')
+
+    while jobs or running:
+        # hand out jobs to idle workers
+        for index, (process, connection) in enumerate(pool):
+            while index not in running and jobs:
+                job = jobs.popleft()
+                if settled_by_bounds(job):
+                    report(job, 'bound')
+                    continue
+                if skipped(job):
+                    report(job, 'skipped')
+                    continue
+                connection.send(job)
+                running[index] = (job, time.time())
+
+        ready = wait([pool[index][1] for index in running], timeout=0.5)
+        for index in list(running):
+            process, connection = pool[index]
+            job, job_start = running[index]
+            if connection in ready:
+                try:
+                    message = connection.recv()
+                except EOFError:
+                    message = ('error', job, 'worker died')
+                    process.join()
+                    pool[index] = start_worker(options)
+                status = message[0]
+                if status == 'timeout':
+                    record_timeout(job)
+                else:
+                    set_job_status(job[0], job[1], job[2], status)
+                    report(job, status if status == 'done' else f"{status}: {message[2]}")
+                del running[index]
+            elif time.time() - job_start > timeout + KILL_GRACE:
+                # the solver did not stop by itself (e.g. still loading the graph)
+                process.kill()
+                process.join()
+                pool[index] = start_worker(options)
+                record_timeout(job)
+                del running[index]
+
+    for process, connection in pool:
+        connection.send(None)
+        process.join()
+
 def run_exhaustive_search():
-    edge_probability = [12, 25, 50, 75]
-
-    for probability in edge_probability:
-        vertices = 4
-        while vertices <= 100:
-            try:
-                subprocess.run(
-                    f"python3 exhaustive_search.py graphs/graph_{str(vertices).zfill(3)}_{probability}.json",
-                    shell=True,
-                    timeout=60
-                )
-            except subprocess.TimeoutExpired:
-                print(f"Graph with {vertices} vertices and {probability}% edges took more than 1 minute to run")
-                break
-            
-            vertices += 1
+    run_experiment(['exhaustive'])
 
 def run_greedy_search():
-    edge_probability = [12, 25, 50, 75]
-
-    for probability in edge_probability:
-        vertices = 4
-        while vertices <= 100:
-            try:
-                subprocess.run(
-                    f"python3 greedy_search.py graphs/graph_{str(vertices).zfill(3)}_{probability}.json",
-                    shell=True,
-                    timeout=60
-                )
-            except subprocess.TimeoutExpired:
-                print(f"Graph with {vertices} vertices and {probability}% edges took more than 1 minute to run")
-                break
-            
-            vertices += 1
+    run_experiment(['greedy'])
 
 def run_randomized_search():
-    edge_probability = [12, 25, 50, 75]
-
-    for probability in edge_probability:
-        vertices = 4
-        while vertices <= 100:
-            try:
-                subprocess.run(
-                    f"python3 randomized_search.py graphs/graph_{str(vertices).zfill(3)}_{probability}.json",
-                    shell=True,
-                    timeout=60
-                )
-            except subprocess.TimeoutExpired:
-                print(f"Graph with {vertices} vertices and {probability}% edges took more than 1 minute to run")
-                break
-            
-            vertices += 1
+    run_experiment(['randomized'])
+
+def run_matching_search():
+    run_experiment(['matching'])
 
 
 if __name__ == "__main__":
-    run_randomized_search()
+    parser = argparse.ArgumentParser(description="Run the edge cover algorithms over every graph in graphs/")
+    parser.add_argument('algorithms', nargs='*', default=['randomized'], help=f"any of {', '.join(ALGORITHMS)} (default: randomized)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--timeout', type=float, default=60, help="seconds before a job is killed (default: 60)")
+    parser.add_argument('--retry', action='store_true', help="run again the jobs that timed out before")
+    parser.add_argument('--components', action='store_true', help="solve every connected component of a graph on its own")
+    parser.add_argument('--kernelize', action='store_true', help="solve the kernel of every graph (forced edges taken first)")
+    parser.add_argument('--no-bounds', action='store_true', help="search every k, even the ones the feasibility bounds settle")
+    parser.add_argument('--no-checkpoint', action='store_true', help="do not save the progress of the exhaustive search (--retry then starts over)")
+    arguments = parser.parse_args()
+
+    unknown = [algorithm for algorithm in arguments.algorithms if algorithm not in ALGORITHMS]
+    if unknown:
+        parser.error(f"unknown algorithm(s): {', '.join(unknown)}")
+
+    run_experiment(arguments.algorithms, arguments.workers, arguments.timeout, arguments.retry, arguments.components, arguments.kernelize, not arguments.no_bounds, not arguments.no_checkpoint)
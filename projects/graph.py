@@ -0,0 +1,383 @@
+import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+""" GRAPH REPRESENTATION """
+
+class Graph:
+    """
+    Undirected graph with every vertex interned to an int in 0..n-1.
+
+    - labels[v]: original name of vertex v (e.g. "(123, 456)")
+    - offsets / neighbors: CSR adjacency, the neighbors of v are neighbors[offsets[v]:offsets[v + 1]]
+    - incident_edges: aligned with neighbors, incident_edges[i] is the id of the edge (v, neighbors[i])
+    - edge_u / edge_v: endpoints of edge e, always edge_u[e] < edge_v[e]
+    """
+
+    def __init__(self, labels: Sequence[str], offsets: Sequence[int], neighbors: Sequence[int],
+                 incident_edges: Sequence[int], edge_u: Sequence[int], edge_v: Sequence[int]):
+        self.labels = labels
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.incident_edges = incident_edges
+        self.edge_u = edge_u
+        self.edge_v = edge_v
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self.labels)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_u)
+
+    def degree(self, vertex: int) -> int:
+        return self.offsets[vertex + 1] - self.offsets[vertex]
+
+    def incident(self, vertex: int) -> Sequence[int]:
+        """Ids of the edges incident to vertex."""
+        return self.incident_edges[self.offsets[vertex]:self.offsets[vertex + 1]]
+
+    def edge_label(self, edge: int) -> Tuple[str, str]:
+        """Edge as a pair of vertex names, in the same (sorted) order the results files use."""
+        u, v = self.labels[self.edge_u[edge]], self.labels[self.edge_v[edge]]
+        return (u, v) if u < v else (v, u)
+
+    def edge_labels(self, edges: Iterable[int]) -> List[Tuple[str, str]]:
+        return [self.edge_label(edge) for edge in edges]
+
+    def __getstate__(self):
+        # memory-mapped arrays cannot be pickled, worker processes get a copy
+        return {name: array('i', value) if isinstance(value, memoryview) else value
+                for name, value in self.__dict__.items()}
+
+
+class CoordinateLabels:
+    """Labels "(x, y)" of the generated graphs, built on access from the coordinate arrays."""
+
+    def __init__(self, xs: Sequence[int], ys: Sequence[int]):
+        self.xs = xs
+        self.ys = ys
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def __getitem__(self, vertex: int) -> str:
+        return f"({self.xs[vertex]}, {self.ys[vertex]})"
+
+    def __getstate__(self):
+        return {'xs': array('i', self.xs), 'ys': array('i', self.ys)}
+
+
+class IndexLabels:
+    """Labels of graphs whose vertices are already named 0..n-1 (like the Twitch datasets)."""
+
+    def __init__(self, num_vertices: int):
+        self.num_vertices = num_vertices
+
+    def __len__(self) -> int:
+        return self.num_vertices
+
+    def __getitem__(self, vertex: int) -> str:
+        if not 0 <= vertex < self.num_vertices:
+            raise IndexError(vertex)
+        return str(vertex)
+
+
+""" CONSTRUCTION FUNCTIONS """
+
+def build_graph(labels: Sequence[str], edge_u: Sequence[int], edge_v: Sequence[int]) -> Graph:
+    """
+    Build the CSR arrays from an edge table.
+    edge_u / edge_v must already be deduplicated, without self loops and with edge_u[e] < edge_v[e].
+    """
+    n = len(labels)
+    m = len(edge_u)
+
+    offsets = array('i', [0]) * (n + 1)
+    for e in range(m):
+        offsets[edge_u[e] + 1] += 1
+        offsets[edge_v[e] + 1] += 1
+    for v in range(n):
+        offsets[v + 1] += offsets[v]
+
+    neighbors = array('i', [0]) * (2 * m)
+    incident_edges = array('i', [0]) * (2 * m)
+    position = array('i', offsets[:n])
+    for e in range(m):
+        u, v = edge_u[e], edge_v[e]
+        neighbors[position[u]] = v
+        incident_edges[position[u]] = e
+        position[u] += 1
+        neighbors[position[v]] = u
+        incident_edges[position[v]] = e
+        position[v] += 1
+
+    return Graph(labels, offsets, neighbors, incident_edges, array('i', edge_u), array('i', edge_v))
+
+def induced_subgraph(graph: Graph, vertices: List[int]) -> Tuple[Graph, List[int]]:
+    """
+    Subgraph on the given (sorted) vertices, renumbered 0..len(vertices)-1 in the same order,
+    with the edges whose two endpoints are among them.
+    Returns the subgraph and the id in graph of each of its edges, edges keep their relative order.
+    """
+    local = {vertex: index for index, vertex in enumerate(vertices)}
+    edges = sorted(edge for vertex in vertices for edge in graph.incident(vertex)
+                   if graph.edge_u[edge] == vertex and graph.edge_v[edge] in local)
+    edge_u = array('i', (local[graph.edge_u[edge]] for edge in edges))
+    edge_v = array('i', (local[graph.edge_v[edge]] for edge in edges))
+    return build_graph([graph.labels[vertex] for vertex in vertices], edge_u, edge_v), edges
+
+def graph_from_adjacency(adjacency: Dict[str, List[str]]) -> Graph:
+    """
+    Intern an adjacency dict {vertex: [neighbor, ...]} into a Graph.
+    Vertices get ids in order of first appearance and edges in order of discovery,
+    so the same file always produces the same ids.
+    """
+    ids: Dict[str, int] = {}
+    labels: List[str] = []
+    for vertex, vertex_neighbors in adjacency.items():
+        for name in (vertex, *vertex_neighbors):
+            if name not in ids:
+                ids[name] = len(labels)
+                labels.append(name)
+
+    n = len(labels)
+    edge_u = array('i')
+    edge_v = array('i')
+    seen = set()
+    for vertex, vertex_neighbors in adjacency.items():
+        u = ids[vertex]
+        for neighbor in vertex_neighbors:
+            v = ids[neighbor]
+            if u == v:
+                continue
+            low, high = (u, v) if u < v else (v, u)
+            # each edge appears twice in an adjacency dict, keep the first one
+            key = low * n + high
+            if key in seen:
+                continue
+            seen.add(key)
+            edge_u.append(low)
+            edge_v.append(high)
+
+    return build_graph(labels, edge_u, edge_v)
+
+def deduplicate_edges(num_vertices: int, edge_u: Sequence[int], edge_v: Sequence[int]) -> Tuple[array, array]:
+    """Edge table without self loops and repeated edges, with u < v, keeping the first occurrence."""
+    deduplicated_u = array('i')
+    deduplicated_v = array('i')
+    seen = set()
+    for u, v in zip(edge_u, edge_v):
+        if u == v:
+            continue
+        low, high = (u, v) if u < v else (v, u)
+        key = low * num_vertices + high
+        if key in seen:
+            continue
+        seen.add(key)
+        deduplicated_u.append(low)
+        deduplicated_v.append(high)
+    return deduplicated_u, deduplicated_v
+
+def graph_from_edge_list(pairs: Iterable[Tuple[str, str]]) -> Graph:
+    """
+    Intern an edge list [(u, v), ...] into a Graph, dropping self loops and repeated edges.
+    Vertices named 0..n-1 keep their number as id, otherwise they get ids in order of first appearance.
+    """
+    ids: Dict[str, int] = {}
+    labels: List[str] = []
+    edge_u = array('i')
+    edge_v = array('i')
+    for pair in pairs:
+        for name in pair:
+            if name not in ids:
+                ids[name] = len(labels)
+                labels.append(name)
+        edge_u.append(ids[pair[0]])
+        edge_v.append(ids[pair[1]])
+
+    n = len(labels)
+    if all(name.isdigit() and str(int(name)) == name and int(name) < n for name in labels):
+        renumber = [int(name) for name in labels]
+        labels = IndexLabels(n)
+    else:
+        renumber = range(n)
+
+    deduplicated_u, deduplicated_v = deduplicate_edges(n, array('i', (renumber[u] for u in edge_u)),
+                                                       array('i', (renumber[v] for v in edge_v)))
+
+    return build_graph(labels, deduplicated_u, deduplicated_v)
+
+def load_edge_list(filename: str) -> Graph:
+    """
+    Load graph from a CSV edge list with a header line (e.g. "from,to").
+    The edge lists of graph_generator.py come with a .vertices.csv of coordinates, which
+    keeps the isolated vertices and the "(x, y)" names.
+    """
+    vertices_filename = filename[:-len('.edges.csv')] + '.vertices.csv' if filename.endswith('.edges.csv') else None
+    if vertices_filename is None or not os.path.exists(vertices_filename):
+        with open(filename, 'r', newline='') as f:
+            rows = csv.reader(f)
+            next(rows, None)
+            return graph_from_edge_list((row[0], row[1]) for row in rows if row)
+
+    xs, ys = array('i'), array('i')
+    with open(vertices_filename, 'r', newline='') as f:
+        rows = csv.reader(f)
+        next(rows, None)
+        for row in rows:
+            xs.append(int(row[1]))
+            ys.append(int(row[2]))
+    edge_u, edge_v = array('i'), array('i')
+    with open(filename, 'r', newline='') as f:
+        rows = csv.reader(f)
+        next(rows, None)
+        for row in rows:
+            # generated edge lists have no repeated edges and always from < to
+            edge_u.append(int(row[0]))
+            edge_v.append(int(row[1]))
+    return build_graph(CoordinateLabels(xs, ys), edge_u, edge_v)
+
+def file_digest(filename: str) -> str:
+    """SHA-256 of the contents of a file, identifies a graph whatever its path or modification time."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_graph(filename: str) -> Graph:
+    """Load graph from a JSON adjacency file, a CSV edge list or a binary graph file."""
+    if filename.endswith(BINARY_EXTENSION):
+        return load_graph_binary(filename)
+    if filename.endswith('.csv'):
+        return load_edge_list(filename)
+    with open(filename, 'r') as f:
+        return graph_from_adjacency(json.load(f))
+
+
+""" BINARY FORMAT """
+
+# Header: magic, version, vertices, edges, kind of labels, size in bytes of the labels table.
+# Followed by int32 little endian arrays offsets (n+1), neighbors (2m), incident_edges (2m),
+# edge_u (m), edge_v (m) and the labels table:
+#   - LABELS_INDEX: nothing, vertex v is named "v"
+#   - LABELS_COORDINATES: int32 xs (n) and ys (n), vertex v is named "(x, y)"
+#   - LABELS_TEXT: the names as UTF-8, one per line
+BINARY_MAGIC = b'AAGR'
+BINARY_VERSION = 1
+BINARY_EXTENSION = '.bin'
+BINARY_HEADER = struct.Struct('<4sIIIIQ')
+LABELS_INDEX, LABELS_COORDINATES, LABELS_TEXT = 0, 1, 2
+
+
+def parse_coordinates(labels: Sequence[str]):
+    """Coordinate arrays of labels that are all "(x, y)", None otherwise."""
+    xs, ys = array('i'), array('i')
+    for label in labels:
+        if not (label.startswith('(') and label.endswith(')')):
+            return None
+        parts = label[1:-1].split(', ')
+        if len(parts) != 2 or not all(part.lstrip('-').isdigit() for part in parts):
+            return None
+        xs.append(int(parts[0]))
+        ys.append(int(parts[1]))
+    return xs, ys
+
+def little_endian(values: Sequence[int]) -> bytes:
+    values = array('i', values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+def save_graph_binary(graph: Graph, filename: str):
+    """Write a graph in the binary format read by load_graph_binary."""
+    labels = graph.labels
+    coordinates = None
+    if isinstance(labels, IndexLabels):
+        kind, table = LABELS_INDEX, b''
+    elif isinstance(labels, CoordinateLabels):
+        coordinates = (labels.xs, labels.ys)
+    else:
+        coordinates = parse_coordinates(labels)
+        if coordinates is None:
+            kind, table = LABELS_TEXT, '\n'.join(labels).encode('utf-8')
+    if coordinates is not None:
+        kind, table = LABELS_COORDINATES, little_endian(coordinates[0]) + little_endian(coordinates[1])
+
+    with open(filename, 'wb') as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, graph.num_vertices, graph.num_edges, kind, len(table)))
+        for values in (graph.offsets, graph.neighbors, graph.incident_edges, graph.edge_u, graph.edge_v):
+            f.write(little_endian(values))
+        f.write(table)
+
+def load_graph_binary(filename: str) -> Graph:
+    """
+    Load a binary graph file. The arrays are memory-mapped, not copied: loading only
+    reads the header and the pages are read from disk when the solver touches them.
+    """
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < BINARY_HEADER.size:
+            raise ValueError(f"{filename} is not a binary graph file")
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    magic, version, n, m, kind, table_size = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"{filename} is not a binary graph file")
+    if version != BINARY_VERSION:
+        raise ValueError(f"{filename} has version {version} of the binary format, expected {BINARY_VERSION}")
+    if len(data) != BINARY_HEADER.size + 4 * (n + 1 + 6 * m) + table_size:
+        raise ValueError(f"{filename} is truncated")
+
+    position = BINARY_HEADER.size
+
+    def int_array(length: int) -> Sequence[int]:
+        nonlocal position
+        values = data[position:position + 4 * length]
+        position += 4 * length
+        if sys.byteorder == 'little':
+            return values.cast('i')
+        swapped = array('i', values.tobytes())
+        swapped.byteswap()
+        return swapped
+
+    offsets = int_array(n + 1)
+    neighbors = int_array(2 * m)
+    incident_edges = int_array(2 * m)
+    edge_u = int_array(m)
+    edge_v = int_array(m)
+
+    if kind == LABELS_INDEX:
+        labels = IndexLabels(n)
+    elif kind == LABELS_COORDINATES:
+        labels = CoordinateLabels(int_array(n), int_array(n))
+    elif kind == LABELS_TEXT:
+        labels = bytes(data[position:position + table_size]).decode('utf-8').split('\n') if n else []
+    else:
+        raise ValueError(f"{filename} has an unknown kind of labels {kind}")
+
+    return Graph(labels, offsets, neighbors, incident_edges, edge_u, edge_v)
+
+def convert_to_binary(filename: str, binary_filename: str = None) -> str:
+    """Convert a JSON adjacency file or a CSV edge list to the binary format, next to it by default."""
+    if binary_filename is None:
+        binary_filename = os.path.splitext(filename)[0] + BINARY_EXTENSION
+    save_graph_binary(load_graph(filename), binary_filename)
+    return binary_filename
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 graph.py <graph_file.json|edges.csv> [...]")
+        sys.exit(1)
+
+    for filename in sys.argv[1:]:
+        print(f"{filename} -> {convert_to_binary(filename)}")
@@ -0,0 +1,164 @@
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from components import UnionFind
+from graph import (BINARY_EXTENSION, BINARY_VERSION, Graph, file_digest, load_graph, load_graph_binary,
+                   save_graph_binary)
+
+
+""" GRAPH CACHE """
+
+# Parsed graphs in the binary format of graph.py, named after the SHA-256 of the file they
+# come from: a file whose contents change gets another name, so an entry is never stale,
+# the old one is only evicted. Every entry has a .json of statistics next to it.
+CACHE_FOLDER = 'cache'
+# the least recently used entries are removed once the cache is over this many bytes
+CACHE_SIZE_LIMIT = 256 << 20
+STATS_EXTENSION = '.json'
+
+
+def entry_filename(digest: str, folder: str = CACHE_FOLDER) -> str:
+    # the format version is part of the name, a new version never reads an old entry
+    return os.path.join(folder, f"{digest}_v{BINARY_VERSION}{BINARY_EXTENSION}")
+
+def stats_filename(digest: str, folder: str = CACHE_FOLDER) -> str:
+    return os.path.splitext(entry_filename(digest, folder))[0] + STATS_EXTENSION
+
+def graph_stats(graph: Graph) -> Dict:
+    """Counts of a graph the scripts ask for again and again (degrees, isolated vertices, components)."""
+    offsets = graph.offsets
+    degrees = [end - start for start, end in zip(offsets, offsets[1:])]
+    sets = UnionFind(graph.num_vertices)
+    forest = sum(1 for edge in range(graph.num_edges) if sets.union(graph.edge_u[edge], graph.edge_v[edge]))
+    return {
+        'num_vertices': graph.num_vertices,
+        'num_edges': graph.num_edges,
+        'min_degree': min(degrees, default=0),
+        'max_degree': max(degrees, default=0),
+        'isolated': degrees.count(0),
+        'components': graph.num_vertices - forest,
+    }
+
+def write_atomically(filename: str, save):
+    """save(temporary filename) then rename, other processes never see half an entry."""
+    temporary = f'{filename}.{os.getpid()}.tmp'
+    try:
+        save(temporary)
+        os.replace(temporary, filename)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+def cache_entries(folder: str = CACHE_FOLDER) -> List[Tuple[float, int, str]]:
+    """(last use, size in bytes, graph filename) of every entry, the least recently used first."""
+    entries = []
+    for name in os.listdir(folder) if os.path.isdir(folder) else []:
+        if not name.endswith(BINARY_EXTENSION):
+            continue
+        filename = os.path.join(folder, name)
+        try:
+            status = os.stat(filename)
+        except FileNotFoundError:
+            # removed by another process
+            continue
+        entries.append((status.st_mtime, status.st_size, filename))
+    return sorted(entries)
+
+def evict(folder: str = CACHE_FOLDER, limit: int = CACHE_SIZE_LIMIT) -> int:
+    """Remove the least recently used entries until the cache holds at most limit bytes. Returns the number removed."""
+    entries = cache_entries(folder)
+    size = sum(entry_size for _, entry_size, _ in entries)
+    removed = 0
+    for _, entry_size, filename in entries:
+        if size <= limit:
+            break
+        for path in (filename, os.path.splitext(filename)[0] + STATS_EXTENSION):
+            try:
+                # a process that mapped the graph keeps reading it, the pages stay until it unmaps them
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        size -= entry_size
+        removed += 1
+    return removed
+
+
+""" LOADING FUNCTIONS """
+
+def cache_graph(filename: str, folder: str = CACHE_FOLDER, limit: int = CACHE_SIZE_LIMIT) -> Tuple[str, Optional[Graph]]:
+    """
+    Cache entry of a graph file, built if it is missing (or unreadable).
+    Returns the entry filename and the parsed graph when it had to be built, None otherwise.
+    """
+    digest = file_digest(filename)
+    cached = entry_filename(digest, folder)
+    if os.path.exists(cached):
+        try:
+            # the modification time of an entry is its last use
+            os.utime(cached)
+            return cached, None
+        except FileNotFoundError:
+            # evicted by another process since
+            pass
+
+    graph = load_graph(filename)
+    os.makedirs(folder, exist_ok=True)
+    stats = dict(graph_stats(graph), source=filename)
+
+    def save_stats(temporary: str):
+        with open(temporary, 'w') as f:
+            json.dump(stats, f, indent=4)
+
+    write_atomically(stats_filename(digest, folder), save_stats)
+    write_atomically(cached, lambda temporary: save_graph_binary(graph, temporary))
+    evict(folder, limit)
+    return cached, graph
+
+def load_graph_cached(filename: str, folder: str = CACHE_FOLDER, limit: int = CACHE_SIZE_LIMIT) -> Graph:
+    """
+    load_graph through the cache: a file already seen (same contents, whatever its path) is
+    memory-mapped from its entry instead of parsed, only the file is read to hash it.
+    Binary graph files need no parsing and are loaded directly.
+    """
+    if filename.endswith(BINARY_EXTENSION):
+        return load_graph_binary(filename)
+    cached, graph = cache_graph(filename, folder, limit)
+    if graph is not None:
+        return graph
+    try:
+        return load_graph_binary(cached)
+    except (OSError, ValueError):
+        # evicted meanwhile or damaged, parse the file again
+        return load_graph(filename)
+
+def load_stats_cached(filename: str, folder: str = CACHE_FOLDER, limit: int = CACHE_SIZE_LIMIT) -> Dict:
+    """Statistics of a graph file (see graph_stats), from its cache entry."""
+    digest = file_digest(filename)
+    try:
+        with open(stats_filename(digest, folder), 'r') as f:
+            stats = json.load(f)
+        os.utime(entry_filename(digest, folder))
+        return stats
+    except (OSError, ValueError):
+        cache_graph(filename, folder, limit)
+        with open(stats_filename(digest, folder), 'r') as f:
+            return json.load(f)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 graph_cache.py clear | <graph_file> [...]")
+        sys.exit(1)
+
+    if sys.argv[1:] == ['clear']:
+        print(f"Removed {evict(limit=0)} cached graphs")
+        sys.exit(0)
+
+    for filename in sys.argv[1:]:
+        stats = load_stats_cached(filename)
+        print(f"{filename}: {stats['num_vertices']} vertices, {stats['num_edges']} edges, "
+              f"degree {stats['min_degree']}..{stats['max_degree']}, {stats['components']} components")
+    entries = cache_entries()
+    print(f"{len(entries)} cached graphs, {sum(size for _, size, _ in entries) / (1 << 20):.1f} MiB in {CACHE_FOLDER}/")
@@ -1,3 +1,4 @@
+import math
 import random
 import networkx as nx
 import json
@@ -9,77 +10,234 @@ import matplotlib.pyplot as plt
 seed = 108713
 random.seed(seed)
 
-def generate_vertex(existing_vertices):
+# Two vertices are too close when their squared distance is below 4
+MIN_SQUARED_DISTANCE = 4
+# Side of the spatial hash cells: a 2x2 cell never holds two vertices and a vertex
+# closer than 2 to another one is always in the same or in one of the 8 neighbouring cells
+CELL_SIZE = 2
+
+class VertexGrid:
+    """Spatial hash of the placed vertices, checking a new vertex in O(1)."""
+
+    def __init__(self):
+        self.cells = {}
+
+    def is_too_close(self, vertex):
+        cell_x, cell_y = vertex[0] // CELL_SIZE, vertex[1] // CELL_SIZE
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                ex = self.cells.get((cell_x + dx, cell_y + dy))
+                if ex is not None and (vertex[0] - ex[0])**2 + (vertex[1] - ex[1])**2 < MIN_SQUARED_DISTANCE:
+                    return True
+        return False
+
+    def add(self, vertex):
+        self.cells[(vertex[0] // CELL_SIZE, vertex[1] // CELL_SIZE)] = vertex
+
+def generate_vertex(existing_vertices, grid=None):
+    """
+    Random vertex in the 1000x1000 grid not too close to the existing ones.
+    With a VertexGrid the check is O(1), the random draws (and so the seeded graphs) are the same.
+    """
     while True:
         x, y = random.randint(1, 1000), random.randint(1, 1000)
-        if not is_too_close((x, y), existing_vertices):
+        too_close = grid.is_too_close((x, y)) if grid is not None else is_too_close((x, y), existing_vertices)
+        if not too_close:
             return (x, y)
         
 def is_too_close(vertex, existing_vertices):
     for ex in existing_vertices:
-        if (vertex[0] - ex[0])**2 + (vertex[1] - ex[1])**2 < 4:
+        if (vertex[0] - ex[0])**2 + (vertex[1] - ex[1])**2 < MIN_SQUARED_DISTANCE:
             return True
     return False
 
-def generate_edges(num_vertices, edge_percent, vertices):
+def generate_vertices_bulk(num_vertices, side=None):
+    """
+    Place num_vertices vertices at once, for graphs far bigger than the 1000x1000 grid holds
+    (at most ~250 000 vertices fit at distance 2). The side of the square defaults to the
+    bigger of 1000 and 4*sqrt(n), so the vertices fill about a quarter of the tightest packing.
+    Candidates are drawn in batches of distinct cells with random.sample and filtered with
+    a VertexGrid. The draws differ from generate_vertex, so the graphs are not the same as
+    the ones of the one by one placement with the same seed.
+    """
+    if side is None:
+        side = max(1000, math.ceil(4 * math.sqrt(num_vertices)))
+    grid = VertexGrid()
+    vertices = []
+    while len(vertices) < num_vertices:
+        missing = num_vertices - len(vertices)
+        batch = min(side * side, 2 * missing)
+        for position in random.sample(range(side * side), batch):
+            vertex = (position // side + 1, position % side + 1)
+            if not grid.is_too_close(vertex):
+                grid.add(vertex)
+                vertices.append(vertex)
+                if len(vertices) == num_vertices:
+                    break
+    return vertices
+
+def unrank_edge(index, num_vertices):
+    """
+    Pair (i, j), i < j, at position index of the lexicographic order of all the vertex pairs
+    ((0, 1), (0, 2), ..., (0, n-1), (1, 2), ...), without building the list of pairs.
+    """
+    # pairs before row i: i*(2n-i-1)/2, solve for the largest i with that count <= index
+    b = 2 * num_vertices - 1
+    i = (b - math.isqrt(b * b - 8 * index)) // 2
+    while i * (b - i) // 2 > index:
+        i -= 1
+    while (i + 1) * (b - i - 1) // 2 <= index:
+        i += 1
+    j = index - i * (b - i) // 2 + i + 1
+    return i, j
+
+def generate_edges(num_vertices, edge_percent):
+    """
+    Yield edge_percent of all the vertex pairs as (i, j) vertex indices.
+    Sampling positions of range() picks the same positions as sampling the old list of all
+    pairs, so the edges (and the seeded graphs) are the same, but only the sampled positions
+    are kept in memory.
+    """
     max_edges = num_vertices * (num_vertices - 1) // 2
     num_edges = int(max_edges * edge_percent)
-    all_possible_edges = [(vertices[i], vertices[j]) for i in range(num_vertices) for j in range(i+1, num_vertices)]
-    edges = random.sample(all_possible_edges, num_edges)
-    
-    return edges
-
-def generate_graph(num_vertices, edge_percent):
-    G = nx.Graph()
+    for index in random.sample(range(max_edges), num_edges):
+        yield unrank_edge(index, num_vertices)
+
+def generate_edges_gnp(num_vertices, probability):
+    """
+    Yield the edges of a G(n, p) random graph as (i, j) vertex indices, in O(n + m) time
+    and O(1) memory (Batagelj and Brandes geometric skipping): the gap until the next edge
+    is drawn directly instead of testing every pair. The number of edges is random, about
+    probability * n(n-1)/2.
+    """
+    if probability <= 0:
+        return
+    if probability >= 1:
+        for j in range(1, num_vertices):
+            for i in range(j):
+                yield i, j
+        return
+    log_q = math.log(1 - probability)
+    j, i = 1, -1
+    while j < num_vertices:
+        i += 1 + int(math.log(1 - random.random()) / log_q)
+        while i >= j and j < num_vertices:
+            i -= j
+            j += 1
+        if j < num_vertices:
+            yield i, j
+
+def generate_vertices(num_vertices, bulk=False):
+    if bulk:
+        return generate_vertices_bulk(num_vertices)
     vertices = []
+    grid = VertexGrid()
     for _ in range(num_vertices):
-        new_vertex = generate_vertex(vertices)
+        new_vertex = generate_vertex(vertices, grid)
         vertices.append(new_vertex)
-        G.add_node(new_vertex)
-
-    edges = generate_edges(num_vertices, edge_percent, vertices)
-    G.add_edges_from(edges)
-
-    return G
-
-
-def save_graph(G, adjacency_list, size, edge_percent, folder, generate_image):
-    filename = os.path.join(folder, f'graph_{str(size).zfill(3)}_{int(edge_percent*100)}.json')
-    # json with adjacency list
+        grid.add(new_vertex)
+    return vertices
+
+def generate_graph(num_vertices, edge_percent, bulk=False):
+    """
+    Vertices and adjacency lists (of vertex indices) of a random graph.
+    The neighbors are in the order the edges were drawn, like networkx kept them.
+    """
+    vertices = generate_vertices(num_vertices, bulk)
+    adjacency = [[] for _ in range(num_vertices)]
+    for i, j in generate_edges(num_vertices, edge_percent):
+        adjacency[i].append(j)
+        adjacency[j].append(i)
+
+    return vertices, adjacency
+
+
+def graph_filename(folder, size, edge_percent, extension):
+    percent = edge_percent * 100
+    percent = int(percent) if percent >= 1 else f"{percent:g}"
+    return os.path.join(folder, f'graph_{str(size).zfill(3)}_{percent}.{extension}')
+
+def save_graph(vertices, adjacency, size, edge_percent, folder, generate_image):
+    filename = graph_filename(folder, size, edge_percent, 'json')
+    # json with adjacency list {node: [neighbor1, neighbor2, ...]}, written one vertex at a
+    # time in the same layout as json.dump(..., indent=4)
+    labels = [json.dumps(str(vertex)) for vertex in vertices]
     with open(filename, 'w') as file:
-        json.dump(adjacency_list, file, indent=4)
+        file.write('{')
+        for v, vertex_neighbors in enumerate(adjacency):
+            file.write(',\n    ' if v else '\n    ')
+            if vertex_neighbors:
+                file.write(f'{labels[v]}: [\n        ')
+                file.write(',\n        '.join(labels[neighbor] for neighbor in vertex_neighbors))
+                file.write('\n    ]')
+            else:
+                file.write(f'{labels[v]}: []')
+        file.write('\n}' if adjacency else '}')
 
     if generate_image:
         # image with graph
+        G = nx.Graph()
+        G.add_nodes_from(vertices)
+        G.add_edges_from((vertices[v], vertices[neighbor]) for v in range(len(vertices)) for neighbor in adjacency[v])
         plt.figure(figsize=(10, 10))
         pos = {node: node for node in G.nodes()}
         nx.draw(G, pos, with_labels=True, node_size=500, font_size=10)
         plt.title(f"Graph with {size} vertices and {int(edge_percent*100)}% edges")
-        plt.savefig(os.path.join(folder, f"graph_{str(size).zfill(3)}_{int(edge_percent*100)}.png"))
+        plt.savefig(graph_filename(folder, size, edge_percent, 'png'))
         plt.close()
 
-
-def generate_and_save_graphs(size, edge_percents, folder, generate_image):
+def save_edge_list(size, edge_percent, folder, bulk=False):
+    """
+    Stream a G(n, p) graph to an edge list CSV like the Twitch ones (header "from,to",
+    vertex indices), without keeping the edges in memory. The vertex coordinates go to a
+    second CSV (id,x,y).
+    """
+    vertices = generate_vertices(size, bulk)
+    with open(graph_filename(folder, size, edge_percent, 'vertices.csv'), 'w') as file:
+        file.write('id,x,y\n')
+        file.writelines(f'{v},{x},{y}\n' for v, (x, y) in enumerate(vertices))
+
+    num_edges = 0
+    with open(graph_filename(folder, size, edge_percent, 'edges.csv'), 'w') as file:
+        file.write('from,to\n')
+        buffer = []
+        for i, j in generate_edges_gnp(size, edge_percent):
+            buffer.append(f'{i},{j}\n')
+            if len(buffer) == 65536:
+                file.writelines(buffer)
+                num_edges += len(buffer)
+                buffer = []
+        file.writelines(buffer)
+        num_edges += len(buffer)
+    return num_edges
+
+
+def generate_and_save_graphs(size, edge_percents, folder, generate_image, bulk=False, edge_list=False):
     if not os.path.exists(folder):
         os.makedirs(folder)
     
 
     for edge_percent in edge_percents:
-        G = generate_graph(size, edge_percent)
-        # {node: [neighbor1, neighbor2, ...]}
-        adjacency_list = {str(node): [str(neighbor) for neighbor in G.neighbors(node)] for node in G.nodes()}
-        save_graph(G, adjacency_list, size, edge_percent, folder, generate_image)
+        if edge_list:
+            save_edge_list(size, edge_percent, folder, bulk)
+            continue
+        vertices, adjacency = generate_graph(size, edge_percent, bulk)
+        save_graph(vertices, adjacency, size, edge_percent, folder, generate_image)
 
 
 if __name__ == '__main__' :
-    if len(sys.argv) < 2 or len(sys.argv) > 3:
-        print("Usage: python3 graph_generator.py <vertices> [image]")
+    options = sys.argv[2:]
+    densities = [option for option in options if option.startswith("density=")]
+    if len(sys.argv) < 2 or len(densities) > 1 or any(option not in ("image", "bulk", "edgelist") for option in options if option not in densities):
+        print("Usage: python3 graph_generator.py <vertices> [image] [bulk] [edgelist] [density=<p>]")
         sys.exit(1)
 
     size = int(sys.argv[1])
-    generate_image = len(sys.argv) == 3 and sys.argv[2] == "image"
+    generate_image = "image" in options
+    bulk = "bulk" in options
+    edge_list = "edgelist" in options
 
-    edge_percents = [0.125, 0.25, 0.5, 0.75]
+    edge_percents = [float(densities[0].split("=", 1)[1])] if densities else [0.125, 0.25, 0.5, 0.75]
     folder = 'graphs'
 
-    generate_and_save_graphs(size, edge_percents, folder, generate_image)
\ No newline at end of file
+    generate_and_save_graphs(size, edge_percents, folder, generate_image, bulk, edge_list)
\ No newline at end of file
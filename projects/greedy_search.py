@@ -1,32 +1,23 @@
-import json
 import sys
 import time
-from typing import Dict, List, Set, Tuple
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
 import math
 
-
-
-""" HELP FUNCTIONS """
-
-def load_graph(filename: str) -> Dict[str, List[str]]:
-    """Load graph from JSON file."""
-    with open(filename, 'r') as f:
-        return json.load(f)
-
-def get_all_edges(graph: Dict[str, List[str]]) -> List[Tuple[str, str]]:
-    """Get all edges from the graph."""
-    edges = set()
-    for vertex, neighbors in graph.items():
-        for neighbor in neighbors:
-            # consistent
-            edge = tuple(sorted([vertex, neighbor]))
-            edges.add(edge)
-    return list(edges)
+from bounds import FeasibilityBounds, resolve_all_by_bounds, resolve_by_bounds
+from components import find_edge_cover_by_components
+from counters import NULL_COUNTER, OperationCounter
+from deadline import CHECK_INTERVAL, Deadline
+from graph import Graph
+from graph_cache import load_graph_cached
+from kernel import find_edge_cover_kernelized
+from local_search import improve_edge_cover
+from results_store import append_result
 
 
 """ ALGORITHM FUNCTIONS """
 
-def calculate_edge_score(edge: Tuple[str, str], uncovered_vertices: Set[str]) -> int:
+def calculate_edge_score(graph: Graph, edge: int, uncovered_vertices: List[bool]) -> int:
     """
     Calculate how many uncovered vertices an edge would cover.
 
@@ -34,122 +25,321 @@ def calculate_edge_score(edge: Tuple[str, str], uncovered_vertices: Set[str]) ->
     2 + 2 = 4
     """
     score = 0
-    if edge[0] in uncovered_vertices:
+    if uncovered_vertices[graph.edge_u[edge]]:
         score += 1
-    if edge[1] in uncovered_vertices:
+    if uncovered_vertices[graph.edge_v[edge]]:
         score += 1
     return score
 
-def find_edge_cover_greedy(graph: Dict[str, List[str]], edges: List[Tuple[str, str]], nr_edge_cover: int) -> Tuple[bool, Set[Tuple[str, str]], int]:
+def greedy_trajectory(graph: Graph, nr_edge_cover: int, deadline: Optional[Deadline] = None,
+                      snapshots: bool = False) -> Tuple[List[int], List[int], int, bool, List[Dict[str, int]]]:
     """
-    Find an edge cover using a greedy heuristic.
-    The heuristic selects edges that cover the most uncovered vertices at each step.
-    
-    Returns:
-        - bool: Whether a solution was found
-        - Set[Tuple[str, str]]: The edge cover if found, empty set otherwise
-        - int: Number of decisions made (edges considered)
+    Greedy construction with a budget of nr_edge_cover edges.
+    The heuristic selects edges that cover the most uncovered vertices at each step,
+    the edge with the lowest id among the best ones.
+
+    Scores can only be 2, 1 or 0 and never go up, so the edges are kept in score buckets
+    scanned in id order: while some edge still scores 2 the next pick is the first one at
+    or after the bucket pointer, and once none is left the score 1 bucket is scanned the
+    same way from the start. An edge leaves a bucket when one of its endpoints is covered,
+    which is seen when the pointer reaches it, so every edge is scored at most twice
+    and the whole construction is O(E).
+    When the deadline expires the construction stops with the picks made so far.
 
-    Basic Operations Count (dentro do while):
-    decisions_made * 10 
+    Returns:
+        - List[int]: The edge ids picked, in order
+        - List[int]: Decisions made after each pick (index i = after i picks, index 0 = 0)
+        - int: Decisions made when the construction stopped
+        - bool: Whether every vertex was covered
+        - List[Dict[str, int]]: With snapshots, the operation counts after each pick (index
+          i = after i picks, index 0 = nothing) and, last, when the construction stopped.
+          Without, only the last one
+
+    Basic Operations Count (counted as the loops run):
+    2 endpoint reads and 2 uncovered checks per edge scored, 1 set insert, 2 endpoint
+    reads and 2 uncovered checks per pick
     """
 
+    deadline = deadline or Deadline()
     decisions_made = 0
-    uncovered_vertices = set(graph.keys())
-    edge_cover = set()
-    available_edges = edges.copy()
+    uncovered_vertices = [True] * graph.num_vertices
+    uncovered_count = graph.num_vertices
+    picks: List[int] = []
+    decisions_after = [0]
+    nr_edges = graph.num_edges
+
+    bucket = 2
+    pointer = 0
+    # local tallies, with snapshots a copy is kept after every pick (the answers of smaller budgets)
+    endpoint_reads = 0
+    uncovered_checks = 0
+    set_inserts = 0
+
+    def counts() -> Dict[str, int]:
+        return {'endpoint_reads': endpoint_reads, 'uncovered_checks': uncovered_checks, 'set_inserts': set_inserts}
+
+    counts_after = [counts()] if snapshots else []
     
-    while len(edge_cover) < nr_edge_cover and uncovered_vertices and available_edges:
-        # edges that cover most uncovered vertices
+    while len(picks) < nr_edge_cover and uncovered_count and len(picks) < nr_edges:
+        # first edge (by id) of the best non empty bucket
         best_edge = None
-        best_score = -1
-        
-        for edge in available_edges:
-            decisions_made += 1
-            score = calculate_edge_score(edge, uncovered_vertices)
-            if score > best_score:
-                best_score = score
-                best_edge = edge
+        while best_edge is None and bucket > 0:
+            while pointer < nr_edges:
+                if decisions_made % CHECK_INTERVAL == 0 and deadline.expired():
+                    break
+                decisions_made += 1
+                endpoint_reads += 2
+                uncovered_checks += 2
+                if calculate_edge_score(graph, pointer, uncovered_vertices) == bucket:
+                    best_edge = pointer
+                    break
+                pointer += 1
+            else:
+                bucket -= 1
+                pointer = 0
+                continue
+            # found the edge, or out of time
+            break
         
-        if best_edge is None or best_score == 0:
+        if best_edge is None:
             break
             
         # best edge
-        edge_cover.add(best_edge)
-        available_edges.remove(best_edge)
+        picks.append(best_edge)
+        set_inserts += 1
+        decisions_after.append(decisions_made)
+        pointer += 1
         
         # update uncovered vertices
-        uncovered_vertices.discard(best_edge[0])
-        uncovered_vertices.discard(best_edge[1])
+        for vertex in (graph.edge_u[best_edge], graph.edge_v[best_edge]):
+            endpoint_reads += 1
+            uncovered_checks += 1
+            if uncovered_vertices[vertex]:
+                uncovered_vertices[vertex] = False
+                uncovered_count -= 1
+        if snapshots:
+            counts_after.append(counts())
     
-    # Check if found a valid cover
-    success = len(uncovered_vertices) == 0 and len(edge_cover) <= nr_edge_cover
-    return success, edge_cover, decisions_made
+    counts_after.append(counts())
+    return picks, decisions_after, decisions_made, uncovered_count == 0, counts_after
+
+def counts_at_budget(picks: List[int], counts_after: List[Dict[str, int]], nr_edge_cover: int) -> Dict[str, int]:
+    """Operation counts of the construction stopped at nr_edge_cover picks (see cut_trajectory), counts_after with snapshots."""
+    if nr_edge_cover < len(picks):
+        return counts_after[nr_edge_cover]
+    if nr_edge_cover == len(picks):
+        return counts_after[-2]
+    return counts_after[-1]
+
+def cut_trajectory(picks: List[int], decisions_after: List[int], final_decisions: int, covered: bool,
+                   counts_after: List[Dict[str, int]], nr_edge_cover: int) -> Tuple[bool, Set[int], int]:
+    """
+    Answer of the greedy search with budget nr_edge_cover from a trajectory built with
+    a budget at least as big: the construction with the smaller budget is the same one
+    stopped after nr_edge_cover picks.
+    """
+    if nr_edge_cover < len(picks):
+        return False, set(picks[:nr_edge_cover]), decisions_after[nr_edge_cover]
+    if nr_edge_cover == len(picks):
+        return covered, set(picks), decisions_after[-1]
+    return covered, set(picks), final_decisions
 
+def improved_trajectory(graph: Graph, deadline: Optional[Deadline], counter: OperationCounter) -> Tuple[List[int], List[int], int, bool, List[Dict[str, int]], Optional[Set[int]]]:
+    """
+    Greedy construction without budget followed by improve_edge_cover (redundant edges
+    removed, 2-for-1 swaps). The construction is the same one as with any budget up to
+    the pick that covers every vertex, so it answers every budget.
+    Returns the trajectory and the improved cover (None if the construction did not cover every vertex).
+    """
+    picks, decisions_after, final_decisions, covered, counts_after = greedy_trajectory(graph, graph.num_edges, deadline)
+    counter.record(**counts_after[-1])
+    improved = improve_edge_cover(graph, set(picks), counter) if covered else None
+    return picks, decisions_after, final_decisions, covered, counts_after, improved
+
+def cut_improved_trajectory(picks: List[int], decisions_after: List[int], final_decisions: int, covered: bool,
+                            counts_after: List[Dict[str, int]], improved: Optional[Set[int]],
+                            nr_edge_cover: int) -> Tuple[bool, Set[int], int]:
+    """Answer for budget nr_edge_cover from improved_trajectory, the improved cover even when it is too big."""
+    if improved is None:
+        return cut_trajectory(picks, decisions_after, final_decisions, covered, counts_after, nr_edge_cover)
+    return len(improved) <= nr_edge_cover, improved, final_decisions
+
+def find_edge_cover_greedy(graph: Graph, nr_edge_cover: int, deadline: Optional[Deadline] = None,
+                           counter: Optional[OperationCounter] = None, local_search: bool = False) -> Tuple[bool, Set[int], int]:
+    """
+    Find an edge cover using a greedy heuristic (see greedy_trajectory).
+    With local_search the construction goes on until every vertex is covered and the cover
+    is then shrunk (see improved_trajectory), which turns some failures into successes.
+    When the deadline expires the edges picked so far are returned.
+    
+    Returns:
+        - bool: Whether a solution was found
+        - Set[int]: The edge ids of the cover if found, empty set otherwise
+        - int: Number of decisions made (edges scored while looking for the next pick,
+          at most 2*len(edges), unlike the full rescan per pick of the original version)
 
-""" ANALYSIS FUNCTIONS """
+    Basic Operations Count (recorded in counter):
+    see greedy_trajectory (and improve_edge_cover)
+    """
+    counter = counter or NULL_COUNTER
+    if local_search:
+        return cut_improved_trajectory(*improved_trajectory(graph, deadline, counter), nr_edge_cover)
+    trajectory = greedy_trajectory(graph, nr_edge_cover, deadline)
+    counter.record(**trajectory[4][-1])
+    return cut_trajectory(*trajectory, nr_edge_cover)
+
+def find_edge_cover_greedy_multi_k(graph: Graph, nr_edge_covers: List[int], deadline: Optional[Deadline] = None,
+                                   counters: Optional[List[OperationCounter]] = None,
+                                   local_search: bool = False) -> List[Tuple[bool, Set[int], int]]:
+    """
+    find_edge_cover_greedy for several budgets with a single construction.
+    The picks never depend on the budget, only where the construction stops, so the
+    trajectory of the biggest budget answers every smaller one.
+    counters (one per budget) get the operations of the construction stopped at that budget.
+    Returns one (success, edge cover, decisions made) per budget, in the same order.
+    """
+    if local_search:
+        counter = OperationCounter() if counters else NULL_COUNTER
+        trajectory = improved_trajectory(graph, deadline, counter)
+        for budget_counter in counters or []:
+            budget_counter.merge(counter)
+        return [cut_improved_trajectory(*trajectory, nr_edge_cover) for nr_edge_cover in nr_edge_covers]
 
-def set_variables_and_analyze_performance(filename: str, k: float, edge_cover_save_solution: bool):
-    # Load the graph
-    graph = load_graph(filename)
+    trajectory = greedy_trajectory(graph, max(nr_edge_covers, default=0), deadline, snapshots=bool(counters))
+    picks, counts_after = trajectory[0], trajectory[4]
+    for counter, nr_edge_cover in zip(counters or [], nr_edge_covers):
+        counter.record(**counts_at_budget(picks, counts_after, nr_edge_cover))
+    return [cut_trajectory(*trajectory, nr_edge_cover) for nr_edge_cover in nr_edge_covers]
 
-    edges = get_all_edges(graph)
 
-    nr_edge_cover = int(len(edges) * k)
+""" ANALYSIS FUNCTIONS """
+
+def set_variables_and_analyze_performance(filename: str, k: float, edge_cover_save_solution: bool,
+                                          graph: Optional[Graph] = None, time_limit: Optional[float] = None,
+                                          local_search: bool = False, components: bool = False,
+                                          kernelize: bool = False, bounds: bool = True) -> bool:
+    """
+    Run the search for one k and store the result. Returns whether it stopped at the time limit.
+    With components every connected component is solved on its own (see components.py),
+    with kernelize the search runs on the kernel of the graph (see kernel.py).
+    Unless bounds is False, a k settled by FeasibilityBounds (bounds.py) is answered without a search.
+    """
+    # Load the graph (unless the caller already has it loaded)
+    if graph is None:
+        graph = load_graph_cached(filename)
+
+    nr_edge_cover = int(graph.num_edges * k)
+    deadline = Deadline(time_limit)
+    counter = OperationCounter()
 
     start_time = time.time()
 
-    success, edge_cover, decisions_made = find_edge_cover_greedy(graph, edges, nr_edge_cover)
+    answer = resolve_by_bounds(FeasibilityBounds(graph, counter), nr_edge_cover) if bounds else None
+    resolved_by = 'search' if answer is None else 'bound'
+    if answer is None:
+        solver = partial(find_edge_cover_greedy, local_search=local_search)
+        if components:
+            solver = partial(find_edge_cover_by_components, solver=solver)
+        if kernelize:
+            solver = partial(find_edge_cover_kernelized, solver=solver)
+        answer = solver(graph, nr_edge_cover, deadline=deadline, counter=counter)
+    success, edge_cover, decisions_made = answer
 
     execution_time = time.time() - start_time
 
     # Basic Operations Count:
-    # (10 operações por decisão tomada,  if you change the algorithm you must change this number )
-    basic_operations_count = decisions_made * 10
+    # ( counted by the algorithm functions themselves, see greedy_trajectory )
+    basic_operations_count = counter.total()
 
-    write_results_to_file(filename, k, success, edge_cover, decisions_made, execution_time, basic_operations_count, edge_cover_save_solution)
+    write_results_to_file(filename, k, success, graph.edge_labels(edge_cover), decisions_made, execution_time, basic_operations_count, edge_cover_save_solution, deadline.reached, counter.counts, local_search, components, kernelize, resolved_by)
+    return deadline.reached
 
+def analyze_performance_multi_k(filename: str, kvalues: List[float], edge_cover_save_solution: bool, local_search: bool = False,
+                                bounds: bool = True):
+    """Same results as set_variables_and_analyze_performance for every k, loading and building once."""
+    graph = load_graph_cached(filename)
 
-def write_results_to_file(graph_filename: str, k: int, success: bool, edge_cover: Set[Tuple[str, str]], decisions_made: int, execution_time: float, basic_operations_count: int, edge_cover_save_solution: bool):
-    
-    results_filename = 'results/greedy_search_results.json'
-    
-    try:
-        with open(results_filename, 'r') as f:
-            results = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        results = {}
+    nr_edge_covers = [int(graph.num_edges * k) for k in kvalues]
+
+    start_time = time.time()
+
+    bounds_counter = OperationCounter()
+    answers = resolve_all_by_bounds(graph, nr_edge_covers, bounds_counter) if bounds else [None] * len(kvalues)
+    resolved_by = ['search' if answer is None else 'bound' for answer in answers]
+    counters = [OperationCounter() for _ in kvalues]
+    for counter in counters:
+        counter.merge(bounds_counter)
+    # a k settled by the bounds takes only the time of the bounds
+    bounds_time = time.time() - start_time
+
+    searched = [i for i, answer in enumerate(answers) if answer is None]
+    if searched:
+        searched_answers = find_edge_cover_greedy_multi_k(graph, [nr_edge_covers[i] for i in searched],
+                                                          counters=[counters[i] for i in searched], local_search=local_search)
+        for i, answer in zip(searched, searched_answers):
+            answers[i] = answer
 
-    if graph_filename not in results:
-        results[graph_filename] = []
+    # the single construction is the execution time of every searched k, flagged as shared_time
+    search_time = time.time() - start_time
 
+    for k, (success, edge_cover, decisions_made), counter, resolved in zip(kvalues, answers, counters, resolved_by):
+        execution_time = bounds_time if resolved == 'bound' else search_time
+        basic_operations_count = counter.total()
+        write_results_to_file(filename, k, success, graph.edge_labels(edge_cover), decisions_made, execution_time, basic_operations_count, edge_cover_save_solution, operation_counts=counter.counts, local_search=local_search, resolved_by=resolved, shared_time=resolved == 'search' and len(searched) > 1)
+
+
+def write_results_to_file(graph_filename: str, k: int, success: bool, edge_cover: List[Tuple[str, str]], decisions_made: int, execution_time: float, basic_operations_count: int, edge_cover_save_solution: bool, timed_out: bool = False, operation_counts: Optional[Dict[str, int]] = None, local_search: bool = False, components: bool = False, kernelized: bool = False, resolved_by: str = 'search', shared_time: bool = False):
+    
     result_entry = {
         'k': k,
         'success': success,
         'decisions_made': decisions_made,
         'execution_time': execution_time,
-        'basic_operations_count': basic_operations_count
+        'basic_operations_count': basic_operations_count,
+        # 'bound' when FeasibilityBounds settled k without a search (bounds.py)
+        'resolved_by': resolved_by
     }
 
+    if operation_counts is not None:
+        # the basic operations count split by kind of operation
+        result_entry['operation_counts'] = dict(operation_counts)
+
+    if local_search:
+        # the cover was shrunk by improve_edge_cover after the construction
+        result_entry['local_search'] = True
+
+    if components:
+        # every connected component was solved separately (components.py)
+        result_entry['components'] = True
+
+    if kernelized:
+        # solved on the kernel of the graph, forced edges added back (kernel.py)
+        result_entry['kernelized'] = True
+
+    if shared_time:
+        # one run answered several k, the execution time is the time of that whole run
+        result_entry['shared_time'] = True
+
+    if timed_out:
+        # the construction was stopped, the edges are the ones picked in time
+        result_entry['timed_out'] = True
+
     if edge_cover_save_solution:
         result_entry['edge_cover'] = list(edge_cover)
 
-    results[graph_filename].append(result_entry)
-
-    with open(results_filename, 'w') as f:
-        json.dump(results, f, indent=4)
+    append_result('greedy', graph_filename, result_entry)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2 or len(sys.argv) > 3:
-        print("Usage: python greedy_search.py <graph_file> [solution]")
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        print("Usage: python greedy_search.py <graph_file> [solution] [improve]")
         sys.exit(1)
 
     graph_filename = sys.argv[1]
     
-    edge_cover_save_solution = len(sys.argv) == 3 and sys.argv[2] == "solution"
+    edge_cover_save_solution = "solution" in sys.argv[2:]
+    local_search = "improve" in sys.argv[2:]
 
     kvalues = [0.125, 0.25, 0.5, 0.75]
 
-    for k in kvalues:
-        set_variables_and_analyze_performance(graph_filename, k, edge_cover_save_solution)
\ No newline at end of file
+    analyze_performance_multi_k(graph_filename, kvalues, edge_cover_save_solution, local_search)
\ No newline at end of file
@@ -0,0 +1,126 @@
+from collections import deque
+from typing import Callable, List, Optional, Set, Tuple
+
+from counters import NULL_COUNTER, OperationCounter
+from deadline import Deadline
+from graph import Graph, induced_subgraph
+
+
+""" HELP FUNCTIONS """
+
+class Kernel:
+    """
+    Reduced edge cover instance.
+
+    - forced: edge ids (of the original graph) that some minimum edge cover contains
+    - graph: the vertices the forced edges leave uncovered and the edges between them
+    - edges: the id in the original graph of every edge of graph
+
+    A cover of graph plus the forced edges is a cover of the original graph, and a minimum
+    one gives a minimum one, so the original graph has a cover of k edges exactly when graph
+    has one of k - len(forced) edges.
+    """
+
+    def __init__(self, graph: Graph, edges: List[int], forced: Set[int]):
+        self.graph = graph
+        self.edges = edges
+        self.forced = forced
+
+    def lift(self, edge_cover: Set[int]) -> Set[int]:
+        """Cover of the original graph from a cover of the reduced one."""
+        return self.forced | {self.edges[edge] for edge in edge_cover}
+
+
+""" ALGORITHM FUNCTIONS """
+
+def kernelize(graph: Graph, counter: Optional[OperationCounter] = None) -> Optional[Kernel]:
+    """
+    Apply the reduction rules until none applies (O(V + E)):
+    - a vertex with a single edge to an uncovered vertex takes that edge: any cover covers
+      it with some edge, swapping that edge for this one keeps a cover of the same size
+    - a vertex with no edge left to an uncovered vertex takes any edge to a covered one
+      (all of them cover only that vertex)
+    - once both endpoints of an edge are covered the edge is useless and dropped
+    Returns None when some vertex has no edge at all (no edge cover exists).
+
+    Basic Operations Count (recorded in counter):
+    1 degree update per edge around a newly covered vertex and 1 adjacency read per
+    edge scanned looking for the edge of a reduced vertex
+    """
+    counter = counter or NULL_COUNTER
+    covered = [False] * graph.num_vertices
+    # number of uncovered neighbors of every vertex
+    degree = [graph.degree(vertex) for vertex in range(graph.num_vertices)]
+    forced: Set[int] = set()
+    pending = deque(vertex for vertex in range(graph.num_vertices) if degree[vertex] <= 1)
+    degree_updates = 0
+    reads = 0
+
+    def cover(vertex: int):
+        nonlocal degree_updates
+        covered[vertex] = True
+        for i in range(graph.offsets[vertex], graph.offsets[vertex + 1]):
+            neighbor = graph.neighbors[i]
+            degree[neighbor] -= 1
+            if not covered[neighbor] and degree[neighbor] == 1:
+                pending.append(neighbor)
+        degree_updates += graph.degree(vertex)
+
+    try:
+        while pending:
+            vertex = pending.popleft()
+            if covered[vertex]:
+                continue
+            if graph.degree(vertex) == 0:
+                return None
+            # the edge to the uncovered neighbor if there is one, otherwise any edge
+            chosen = -1
+            for i in range(graph.offsets[vertex], graph.offsets[vertex + 1]):
+                reads += 1
+                chosen = i
+                if not covered[graph.neighbors[i]]:
+                    break
+            forced.add(graph.incident_edges[chosen])
+            cover(vertex)
+            if not covered[graph.neighbors[chosen]]:
+                cover(graph.neighbors[chosen])
+    finally:
+        counter.record(degree_updates=degree_updates, adjacency_reads=reads)
+
+    reduced, edges = induced_subgraph(graph, [vertex for vertex in range(graph.num_vertices) if not covered[vertex]])
+    return Kernel(reduced, edges, forced)
+
+def find_edge_cover_kernelized(graph: Graph, nr_edge_cover: int, solver: Callable, deadline: Optional[Deadline] = None,
+                               counter: Optional[OperationCounter] = None) -> Tuple[bool, Set[int], int]:
+    """
+    Run solver(graph, budget, deadline=deadline, counter=counter) on the kernel of graph
+    with the budget left after the forced edges, and lift its cover back.
+    Answers without the solver when the budget is over the number of edges (like every
+    solver), when no cover exists, when the forced edges alone are over the budget or when
+    they already cover every vertex.
+
+    Returns:
+        - bool: Whether a solution was found
+        - Set[int]: The lifted edge cover if found, empty set otherwise (when the deadline
+          expires, the lifted cover the solver returned)
+        - int: The work of the solver (decisions made or configurations tested)
+
+    Basic Operations Count (recorded in counter):
+    see kernelize, plus the ones of the solver on the kernel
+    """
+    if nr_edge_cover > graph.num_edges:
+        return False, set(), 0
+    deadline = deadline or Deadline()
+    counter = counter or NULL_COUNTER
+    kernel = kernelize(graph, counter)
+    if kernel is None or len(kernel.forced) > nr_edge_cover:
+        return False, set(), 0
+    if kernel.graph.num_vertices == 0:
+        return True, set(kernel.forced), 0
+
+    # a cover never needs more edges than the kernel has
+    budget = min(nr_edge_cover - len(kernel.forced), kernel.graph.num_edges)
+    success, edge_cover, work = solver(kernel.graph, budget, deadline=deadline, counter=counter)
+    if success:
+        return True, kernel.lift(edge_cover), work
+    return False, kernel.lift(edge_cover) if deadline.reached and edge_cover else set(), work
@@ -0,0 +1,387 @@
+import sys
+import time
+from collections import deque
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
+
+from bounds import FeasibilityBounds, resolve_by_bounds
+from components import find_edge_cover_by_components
+from counters import NULL_COUNTER, OperationCounter
+from deadline import Deadline
+from graph import Graph
+from graph_cache import load_graph_cached
+from kernel import find_edge_cover_kernelized
+from results_store import append_result
+
+
+""" HELP FUNCTIONS """
+
+def bipartition(graph: Graph, counter: Optional[OperationCounter] = None) -> Optional[List[int]]:
+    """2-colouring of the graph (0/1 per vertex) or None if the graph is not bipartite."""
+    counter = counter or NULL_COUNTER
+    colour = [-1] * graph.num_vertices
+    reads = 0
+    for start in range(graph.num_vertices):
+        if colour[start] != -1:
+            continue
+        colour[start] = 0
+        queue = deque([start])
+        while queue:
+            vertex = queue.popleft()
+            reads += graph.degree(vertex)
+            for i in range(graph.offsets[vertex], graph.offsets[vertex + 1]):
+                neighbor = graph.neighbors[i]
+                if colour[neighbor] == -1:
+                    colour[neighbor] = 1 - colour[vertex]
+                    queue.append(neighbor)
+                elif colour[neighbor] == colour[vertex]:
+                    counter.record(colouring_reads=reads)
+                    return None
+    counter.record(colouring_reads=reads)
+    return colour
+
+def greedy_matching(graph: Graph) -> List[int]:
+    """Initial maximal matching, mate[v] is the vertex matched with v or -1."""
+    mate = [-1] * graph.num_vertices
+    for edge in range(graph.num_edges):
+        u, v = graph.edge_u[edge], graph.edge_v[edge]
+        if mate[u] == -1 and mate[v] == -1:
+            mate[u] = v
+            mate[v] = u
+    return mate
+
+
+""" ALGORITHM FUNCTIONS """
+
+def maximum_matching_hopcroft_karp(graph: Graph, colour: List[int], deadline: Optional[Deadline] = None) -> Tuple[List[int], int]:
+    """
+    Maximum matching of a bipartite graph with Hopcroft-Karp.
+    When the deadline expires the matching built so far is returned (valid, maybe not maximum).
+    Returns:
+        - List[int]: mate[v], the vertex matched with v or -1
+        - int: Number of edges examined
+    """
+    deadline = deadline or Deadline()
+    offsets, neighbors = graph.offsets, graph.neighbors
+    mate = greedy_matching(graph)
+    left = [vertex for vertex in range(graph.num_vertices) if colour[vertex] == 0]
+    edges_examined = graph.num_edges
+    infinity = graph.num_vertices + 1
+
+    while True:
+        # BFS from the free left vertices, layering the graph by alternating path length
+        dist = [infinity] * graph.num_vertices
+        queue = deque()
+        for vertex in left:
+            if mate[vertex] == -1:
+                dist[vertex] = 0
+                queue.append(vertex)
+        found = False
+        while queue:
+            vertex = queue.popleft()
+            for i in range(offsets[vertex], offsets[vertex + 1]):
+                edges_examined += 1
+                partner = mate[neighbors[i]]
+                if partner == -1:
+                    found = True
+                elif dist[partner] == infinity:
+                    dist[partner] = dist[vertex] + 1
+                    queue.append(partner)
+        if not found or deadline.expired():
+            return mate, edges_examined
+
+        # DFS along the layers for vertex-disjoint shortest augmenting paths
+        position = [offsets[vertex] for vertex in range(graph.num_vertices)]
+        for root in left:
+            if mate[root] != -1:
+                continue
+            if deadline.expired():
+                return mate, edges_examined
+            path = [root]
+            while path:
+                vertex = path[-1]
+                if position[vertex] == offsets[vertex + 1]:
+                    dist[vertex] = infinity
+                    path.pop()
+                    continue
+                neighbor = neighbors[position[vertex]]
+                position[vertex] += 1
+                edges_examined += 1
+                partner = mate[neighbor]
+                if partner == -1:
+                    # augment along the left vertices of the path
+                    for left_vertex in reversed(path):
+                        previous = mate[left_vertex]
+                        mate[left_vertex] = neighbor
+                        mate[neighbor] = left_vertex
+                        neighbor = previous
+                    break
+                if dist[partner] == dist[vertex] + 1:
+                    path.append(partner)
+
+def maximum_matching_blossom(graph: Graph, deadline: Optional[Deadline] = None) -> Tuple[List[int], int]:
+    """
+    Maximum matching of a general graph with Edmonds' blossom algorithm.
+    Odd cycles (blossoms) are contracted by relabelling the base of their vertices.
+    When the search from a free vertex fails, its alternating tree is never part of an
+    augmenting path again and is skipped by the following searches.
+    When the deadline expires the matching built so far is returned (valid, maybe not maximum).
+    Returns:
+        - List[int]: mate[v], the vertex matched with v or -1
+        - int: Number of edges examined
+    """
+    deadline = deadline or Deadline()
+    n = graph.num_vertices
+    offsets, neighbors = graph.offsets, graph.neighbors
+    mate = greedy_matching(graph)
+    parent = [-1] * n
+    base = list(range(n))
+    in_queue = [False] * n
+    dead = [False] * n
+    edges_examined = graph.num_edges
+
+    def lowest_common_ancestor(a: int, b: int) -> int:
+        path = set()
+        while True:
+            a = base[a]
+            path.add(a)
+            if mate[a] == -1:
+                break
+            a = parent[mate[a]]
+        while True:
+            b = base[b]
+            if b in path:
+                return b
+            b = parent[mate[b]]
+
+    def mark_blossom(vertex: int, blossom_base: int, child: int, blossom: Set[int]):
+        while base[vertex] != blossom_base:
+            blossom.add(base[vertex])
+            blossom.add(base[mate[vertex]])
+            parent[vertex] = child
+            child = mate[vertex]
+            vertex = parent[mate[vertex]]
+
+    for root in range(n):
+        if mate[root] != -1 or dead[root]:
+            continue
+        if deadline.expired():
+            break
+
+        tree = [root]
+        # vertices of every contracted blossom, keyed by its base
+        members = {}
+        in_queue[root] = True
+        queue = deque([root])
+        free_end = -1
+
+        while queue and free_end == -1:
+            vertex = queue.popleft()
+            for i in range(offsets[vertex], offsets[vertex + 1]):
+                edges_examined += 1
+                to = neighbors[i]
+                if dead[to] or base[vertex] == base[to] or mate[vertex] == to:
+                    continue
+                if to == root or (mate[to] != -1 and parent[mate[to]] != -1):
+                    # odd cycle: contract the blossom into its base
+                    blossom_base = lowest_common_ancestor(vertex, to)
+                    blossom: Set[int] = set()
+                    mark_blossom(vertex, blossom_base, to, blossom)
+                    mark_blossom(to, blossom_base, vertex, blossom)
+                    blossom.discard(blossom_base)
+                    for old_base in blossom:
+                        for member in members.pop(old_base, (old_base,)):
+                            base[member] = blossom_base
+                            members.setdefault(blossom_base, [blossom_base]).append(member)
+                            if not in_queue[member]:
+                                in_queue[member] = True
+                                queue.append(member)
+                elif parent[to] == -1:
+                    parent[to] = vertex
+                    tree.append(to)
+                    if mate[to] == -1:
+                        free_end = to
+                        break
+                    partner = mate[to]
+                    in_queue[partner] = True
+                    tree.append(partner)
+                    queue.append(partner)
+
+        if free_end != -1:
+            vertex = free_end
+            while vertex != -1:
+                previous = mate[parent[vertex]]
+                mate[vertex] = parent[vertex]
+                mate[parent[vertex]] = vertex
+                vertex = previous
+        else:
+            for tree_vertex in tree:
+                dead[tree_vertex] = True
+
+        for tree_vertex in tree:
+            parent[tree_vertex] = -1
+            base[tree_vertex] = tree_vertex
+            in_queue[tree_vertex] = False
+
+    return mate, edges_examined
+
+def maximum_matching(graph: Graph, deadline: Optional[Deadline] = None,
+                     counter: Optional[OperationCounter] = None) -> Tuple[List[int], int]:
+    """Hopcroft-Karp when the graph is bipartite, blossom algorithm otherwise."""
+    colour = bipartition(graph, counter)
+    if colour is not None:
+        return maximum_matching_hopcroft_karp(graph, colour, deadline)
+    return maximum_matching_blossom(graph, deadline)
+
+def minimum_edge_cover(graph: Graph, deadline: Optional[Deadline] = None,
+                       counter: Optional[OperationCounter] = None) -> Tuple[Optional[Set[int]], int]:
+    """
+    Minimum edge cover by Gallai's theorem: a maximum matching plus one incident edge
+    for every vertex left unmatched.
+    When the deadline expires the cover is built from the matching found so far: still an
+    edge cover, but maybe not a minimum one.
+    Returns:
+        - Set[int]: The edge ids of the cover, None if some vertex is isolated
+        - int: Number of edges examined
+
+    Basic Operations Count (recorded in counter):
+    1 adjacency read per edge examined by the matching (and by the colouring), 1 mate
+    check per vertex and 1 set insert per cover edge
+    """
+    counter = counter or NULL_COUNTER
+    mate, edges_examined = maximum_matching(graph, deadline, counter)
+    edge_cover = set()
+    checks = 0
+    reads = 0
+    for vertex in range(graph.num_vertices):
+        checks += 1
+        if graph.degree(vertex) == 0:
+            edge_cover = None
+            break
+        incident = graph.incident(vertex)
+        if mate[vertex] == -1:
+            edge_cover.add(incident[0])
+        elif vertex < mate[vertex]:
+            # matched edge, recorded once from its lower endpoint
+            for i in range(graph.offsets[vertex], graph.offsets[vertex + 1]):
+                reads += 1
+                if graph.neighbors[i] == mate[vertex]:
+                    edge_cover.add(graph.incident_edges[i])
+                    break
+    counter.record(matching_reads=edges_examined, mate_checks=checks,
+                   cover_reads=reads, set_inserts=len(edge_cover) if edge_cover is not None else 0)
+    return edge_cover, edges_examined
+
+def find_edge_cover_matching(graph: Graph, nr_edge_cover: int, deadline: Optional[Deadline] = None,
+                             counter: Optional[OperationCounter] = None) -> Tuple[bool, Set[int], int]:
+    """
+    Exact answer to "is there an edge cover of size k" in polynomial time.
+    Like the exhaustive search, a cover smaller than k counts as long as the graph
+    has at least k edges to complete it.
+    When the deadline expires the answer uses the cover of the matching found so far, a
+    success is still right but a failure may be wrong.
+
+    Returns:
+        - bool: Whether a solution was found
+        - Set[int]: A minimum edge cover if found, empty set otherwise (when the deadline
+          expires, the cover found so far)
+        - int: Number of decisions made (edges examined)
+    """
+    deadline = deadline or Deadline()
+    edge_cover, decisions_made = minimum_edge_cover(graph, deadline, counter)
+    if edge_cover is None or nr_edge_cover > graph.num_edges:
+        return False, set(), decisions_made
+    if len(edge_cover) > nr_edge_cover:
+        return False, edge_cover if deadline.reached else set(), decisions_made
+    return True, edge_cover, decisions_made
+
+
+""" ANALYSIS FUNCTIONS """
+
+def set_variables_and_analyze_performance(filename: str, k: float, edge_cover_save_solution: bool,
+                                          graph: Optional[Graph] = None, time_limit: Optional[float] = None,
+                                          components: bool = False, kernelize: bool = False, bounds: bool = True) -> bool:
+    """
+    Run the search for one k and store the result. Returns whether it stopped at the time limit.
+    With components every connected component is solved on its own (see components.py),
+    with kernelize the search runs on the kernel of the graph (see kernel.py).
+    Unless bounds is False, a k settled by FeasibilityBounds (bounds.py) is answered without a search.
+    """
+    # Load the graph (unless the caller already has it loaded)
+    if graph is None:
+        graph = load_graph_cached(filename)
+
+    nr_edge_cover = int(graph.num_edges * k)
+    deadline = Deadline(time_limit)
+    counter = OperationCounter()
+
+    start_time = time.time()
+
+    answer = resolve_by_bounds(FeasibilityBounds(graph, counter), nr_edge_cover) if bounds else None
+    resolved_by = 'search' if answer is None else 'bound'
+    if answer is None:
+        solver = find_edge_cover_matching
+        if components:
+            solver = partial(find_edge_cover_by_components, solver=solver)
+        if kernelize:
+            solver = partial(find_edge_cover_kernelized, solver=solver)
+        answer = solver(graph, nr_edge_cover, deadline=deadline, counter=counter)
+    success, edge_cover, decisions_made = answer
+
+    execution_time = time.time() - start_time
+
+    # Basic Operations Count:
+    # ( counted by the algorithm functions themselves, see minimum_edge_cover )
+    basic_operations_count = counter.total()
+
+    write_results_to_file(filename, k, success, graph.edge_labels(edge_cover), decisions_made, execution_time, basic_operations_count, edge_cover_save_solution, deadline.reached, counter.counts, components, kernelize, resolved_by)
+    return deadline.reached
+
+
+def write_results_to_file(graph_filename: str, k: float, success: bool, edge_cover: List[Tuple[str, str]], decisions_made: int, execution_time: float, basic_operations_count: int, edge_cover_save_solution: bool, timed_out: bool = False, operation_counts: Optional[Dict[str, int]] = None, components: bool = False, kernelized: bool = False, resolved_by: str = 'search'):
+
+    result_entry = {
+        'k': k,
+        'success': success,
+        'decisions_made': decisions_made,
+        'execution_time': execution_time,
+        'basic_operations_count': basic_operations_count,
+        # 'bound' when FeasibilityBounds settled k without a search (bounds.py)
+        'resolved_by': resolved_by
+    }
+
+    if operation_counts is not None:
+        # the basic operations count split by kind of operation
+        result_entry['operation_counts'] = dict(operation_counts)
+
+    if components:
+        # every connected component was solved separately (components.py)
+        result_entry['components'] = True
+
+    if kernelized:
+        # solved on the kernel of the graph, forced edges added back (kernel.py)
+        result_entry['kernelized'] = True
+
+    if timed_out:
+        # the matching was stopped, the edge cover may not be a minimum one
+        result_entry['timed_out'] = True
+
+    if edge_cover_save_solution:
+        result_entry['edge_cover'] = list(edge_cover)
+
+    append_result('matching', graph_filename, result_entry)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or len(sys.argv) > 3:
+        print("Usage: python matching_search.py <graph_file> [solution]")
+        sys.exit(1)
+
+    graph_filename = sys.argv[1]
+
+    edge_cover_save_solution = len(sys.argv) == 3 and sys.argv[2] == "solution"
+
+    kvalues = [0.125, 0.25, 0.5, 0.75]
+
+    for k in kvalues:
+        set_variables_and_analyze_performance(graph_filename, k, edge_cover_save_solution)
@@ -1,10 +1,15 @@
 import json
 
 # Carregar os dados dos arquivos JSON
-with open('/home/lilikas11/Curso/AA/first_project/results/exhaustive_search_results.json', 'r') as f:
-    exhaustive_data = json.load(f)
+# Ground truth: the matching search is exact for every graph, the exhaustive search only finishes on small ones
+try:
+    with open('results/matching_search_results.json', 'r') as f:
+        exhaustive_data = json.load(f)
+except FileNotFoundError:
+    with open('results/exhaustive_search_results.json', 'r') as f:
+        exhaustive_data = json.load(f)
 
-with open('/home/lilikas11/Curso/AA/first_project/results/greedy_search_results.json', 'r') as f:
+with open('results/greedy_search_results.json', 'r') as f:
     greedy_data = json.load(f)
 
 # Função para comparar os resultados dos algoritmos
@@ -1,131 +1,453 @@
-import json
+import multiprocessing
+import os
 import sys
 import time
 import random
-from typing import Dict, List, Set, Tuple
-
-def load_graph(filename: str) -> Dict[str, List[str]]:
-    """Load graph from JSON file."""
-    with open(filename, 'r') as f:
-        return json.load(f)
-
-def get_all_edges(graph: Dict[str, List[str]]) -> List[Tuple[str, str]]:
-    """Get all edges from the graph."""
-    edges = set()
-    for vertex, neighbors in graph.items():
-        for neighbor in neighbors:
-            edge = tuple(sorted([vertex, neighbor]))
-            edges.add(edge)
-    return list(edges)
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
+
+from bounds import FeasibilityBounds, resolve_all_by_bounds, resolve_by_bounds
+from components import find_edge_cover_by_components
+from counters import NULL_COUNTER, OperationCounter
+from deadline import CHECK_INTERVAL, Deadline
+from graph import Graph
+from graph_cache import load_graph_cached
+from kernel import find_edge_cover_kernelized
+from local_search import improve_edge_cover
+from results_store import append_result
+
+""" HELP FUNCTIONS """
+
+class FenwickTree:
+    """
+    Fenwick (binary indexed) tree over integer weights.
+    Changing one weight and drawing an index with probability proportional to its
+    weight both take O(log n).
+    """
+
+    def __init__(self, weights: List[int]):
+        self.size = len(weights)
+        self.tree = [0] + list(weights)
+        # linear time build: push every node into its parent
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+        self.total = sum(weights)
+        self.top_bit = 1 << self.size.bit_length() if self.size else 0
+
+    def add(self, index: int, delta: int):
+        """Add delta to the weight of index."""
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, value: int) -> int:
+        """Index whose cumulative weight range contains value (0 <= value < total)."""
+        position = 0
+        step = self.top_bit
+        while step:
+            following = position + step
+            if following <= self.size and self.tree[following] <= value:
+                position = following
+                value -= self.tree[following]
+            step >>= 1
+        return position
+
+    def sample(self, rng=random) -> int:
+        """Index drawn with probability weight / total."""
+        return self.find(rng.randrange(self.total))
+
+class RestartDeadline(Deadline):
+    """
+    Deadline of one restart of a parallel worker: expired when the time limit of the search
+    is, or when another worker already succeeded on an earlier restart (best_restart,
+    shared), the answer can then no longer come from this restart.
+    """
+
+    def __init__(self, deadline: Deadline, best_restart, restart: int):
+        super().__init__()
+        self.deadline = deadline
+        self.best_restart = best_restart
+        self.restart = restart
+
+    def expired(self) -> bool:
+        return self.deadline.expired() or self.best_restart.value < self.restart
+
+    def remaining(self) -> Optional[float]:
+        return self.deadline.remaining()
+
+def restart_rng(seed: int, restart: int) -> random.Random:
+    """Random stream of one restart, derived from the master seed (same for any number of workers)."""
+    return random.Random(f"{seed}-{restart}")
+
 
 """ ALGORITHM FUNCTIONS """
 
-def find_edge_cover_randomized(graph: Dict[str, List[str]], edges: List[Tuple[str, str]], 
-                                nr_edge_cover: int, max_iterations: int = 1000) -> Tuple[bool, Set[Tuple[str, str]], int]:
+def randomized_trial(graph: Graph, initial_weights: List[int], rng=random, deadline: Optional[Deadline] = None,
+                     counter: Optional[OperationCounter] = None, local_search: bool = False) -> Tuple[bool, Set[int], int]:
     """
-    Find an edge cover using a randomized heuristic.
+    One restart of the randomized heuristic.
+    Each edge is picked with probability proportional to the number of uncovered
+    vertices it would cover. The weights live in a Fenwick tree, so a pick costs
+    O(log E) and covering a vertex only updates the edges incident to it.
+    When the deadline expires the trial stops without covering every vertex.
+    With local_search a complete cover is shrunk by improve_edge_cover before it is returned.
+
+    Returns:
+        - bool: Whether every vertex was covered
+        - Set[int]: The edge ids picked
+        - int: Number of decisions made
+
+    Basic Operations Count (recorded in counter):
+    1 weight per edge to build the tree, then per decision 1 random draw, 1 tree search,
+    1 set insert and 2 uncovered checks, and 1 tree update per edge around a newly covered vertex
+    (and the ones of improve_edge_cover)
+    """
+    deadline = deadline or Deadline()
+    counter = counter or NULL_COUNTER
+    decisions_made = 0
+    weight_updates = 0
+    edge_cover = set()
+    uncovered_vertices = [True] * graph.num_vertices
+    uncovered_count = graph.num_vertices
+    weights = FenwickTree(initial_weights)
+    
+    while uncovered_count and len(edge_cover) < graph.num_edges:
+        if decisions_made % CHECK_INTERVAL == 0 and deadline.expired():
+            break
+        decisions_made += 1
+        
+        # Probabilistic edge selection with weight
+        if weights.total == 0:
+            break
+        
+        selected_edge = weights.sample(rng)
+        edge_cover.add(selected_edge)
+        
+        # Update uncovered vertices and the weight of the edges around them
+        for vertex in (graph.edge_u[selected_edge], graph.edge_v[selected_edge]):
+            if uncovered_vertices[vertex]:
+                uncovered_vertices[vertex] = False
+                uncovered_count -= 1
+                for edge in graph.incident(vertex):
+                    weights.add(edge, -1)
+                weight_updates += graph.degree(vertex)
+    
+    counter.record(tree_builds=graph.num_edges, rng_draws=decisions_made, tree_searches=decisions_made,
+                   set_inserts=decisions_made, uncovered_checks=2 * decisions_made, tree_updates=weight_updates)
+    if local_search and uncovered_count == 0:
+        edge_cover = improve_edge_cover(graph, edge_cover, counter)
+    return uncovered_count == 0, edge_cover, decisions_made
+
+def find_edge_cover_randomized(graph: Graph, nr_edge_cover: int, max_iterations: int = 1000, seed: Optional[int] = None,
+                               deadline: Optional[Deadline] = None, counter: Optional[OperationCounter] = None,
+                               local_search: bool = False) -> Tuple[bool, Set[int], int]:
+    """
+    Find an edge cover using a randomized heuristic, restarting up to max_iterations times.
+    With local_search every complete cover is improved before it is compared with k.
+    With a seed every restart uses its own stream (restart_rng), the same ones
+    find_edge_cover_randomized_parallel uses, otherwise the global random module.
     
     Returns:
         - bool: Whether a solution was found
-        - Set[Tuple[str, str]]: The edge cover if found, empty set otherwise
+        - Set[int]: The edge ids of the cover if found, empty set otherwise (when the
+          deadline expires, the smallest cover bigger than k found so far)
         - int: Number of decisions made
+
+    Basic Operations Count (recorded in counter):
+    the ones of every randomized_trial
     """
+    deadline = deadline or Deadline()
     decisions_made = 0
+    best_cover: Set[int] = set()
+    # every edge starts covering its two (uncovered) endpoints
+    initial_weights = [2] * graph.num_edges
     
-    for _ in range(max_iterations):
-        # reset for each iteration
-        edge_cover = set()
-        uncovered_vertices = set(graph.keys())
-        available_edges = edges.copy()
-        
-        while uncovered_vertices and available_edges:
-            decisions_made += 1
-            
-            # randomly select an edge with bias covering more uncovered vertices
-            weighted_edges = [
-                (edge, sum(1 for v in edge if v in uncovered_vertices)) 
-                for edge in available_edges
-            ]
-            
-            # Probabilistic edge selection with weight
-            total_weight = sum(weight for _, weight in weighted_edges)
-            if total_weight == 0:
-                break
-            
-            probabilities = [weight / total_weight for _, weight in weighted_edges]
-            selected_edge = random.choices([edge for edge, _ in weighted_edges], 
-                                           weights=probabilities)[0]
-            
-            edge_cover.add(selected_edge)
-            available_edges.remove(selected_edge)
-            
-            # Update uncovered vertices
-            uncovered_vertices.discard(selected_edge[0])
-            uncovered_vertices.discard(selected_edge[1])
+    for restart in range(max_iterations):
+        if deadline.expired():
+            return False, best_cover, decisions_made
+        rng = random if seed is None else restart_rng(seed, restart)
+        covered, edge_cover, trial_decisions = randomized_trial(graph, initial_weights, rng, deadline, counter, local_search)
+        decisions_made += trial_decisions
         
         # Check if found a valid cover
-        if len(uncovered_vertices) == 0 and len(edge_cover) <= nr_edge_cover:
+        if covered and len(edge_cover) <= nr_edge_cover:
             return True, edge_cover, decisions_made
+        if covered and (not best_cover or len(edge_cover) < len(best_cover)):
+            best_cover = edge_cover
     
-    return False, set(), decisions_made
+    return False, best_cover if deadline.reached else set(), decisions_made
+
+def find_edge_cover_randomized_multi_k(graph: Graph, nr_edge_covers: List[int], max_iterations: int = 1000,
+                                      seed: Optional[int] = None, deadline: Optional[Deadline] = None,
+                                      counters: Optional[List[OperationCounter]] = None,
+                                      local_search: bool = False, answered_at: Optional[List[float]] = None) -> List[Tuple[bool, Set[int], int]]:
+    """
+    find_edge_cover_randomized for several budgets sharing the same restarts.
+    The restarts do not depend on the budget, only which one is accepted, so every
+    restart is checked against all the budgets still open and the loop stops when all
+    of them are answered. With a seed each answer is the one find_edge_cover_randomized
+    gives for that budget alone.
+    counters (one per budget) get the operations of the restarts run until that budget was answered,
+    answered_at (one per budget) the time.time() when it was (when the loop stopped for the unanswered ones).
+    Returns one (success, edge cover, decisions made) per budget, in the same order.
+    """
+    deadline = deadline or Deadline()
+    answers: List[Optional[Tuple[bool, Set[int], int]]] = [None] * len(nr_edge_covers)
+    decisions_made = 0
+    best_cover: Set[int] = set()
+    initial_weights = [2] * graph.num_edges
+
+    for restart in range(max_iterations):
+        if all(answer is not None for answer in answers) or deadline.expired():
+            break
+        rng = random if seed is None else restart_rng(seed, restart)
+        trial_counter = OperationCounter() if counters else NULL_COUNTER
+        covered, edge_cover, trial_decisions = randomized_trial(graph, initial_weights, rng, deadline, trial_counter, local_search)
+        decisions_made += trial_decisions
+        for answer, counter in zip(answers, counters or []):
+            if answer is None:
+                counter.merge(trial_counter)
+
+        if covered:
+            for i, nr_edge_cover in enumerate(nr_edge_covers):
+                if answers[i] is None and len(edge_cover) <= nr_edge_cover:
+                    answers[i] = (True, edge_cover, decisions_made)
+                    if answered_at is not None:
+                        answered_at[i] = time.time()
+            if not best_cover or len(edge_cover) < len(best_cover):
+                best_cover = edge_cover
+
+    unanswered = (False, best_cover if deadline.reached else set(), decisions_made)
+    if answered_at is not None:
+        stopped = time.time()
+        for i, answer in enumerate(answers):
+            if answer is None:
+                answered_at[i] = stopped
+    return [answer if answer is not None else unanswered for answer in answers]
+
+def randomized_worker(graph: Graph, nr_edge_cover: int, max_iterations: int, seed: int,
+                      worker: int, workers: int, best_restart, results, deadline: Deadline, local_search: bool = False):
+    """
+    Runs restarts worker, worker + workers, ... until one succeeds, some worker
+    already succeeded on an earlier restart (best_restart, shared between workers)
+    or the deadline expires. A restart running when an earlier one succeeds stops at its
+    next deadline check (see RestartDeadline).
+    Puts the (restart, decisions made, cover or None, operation counts) of every restart
+    it ran, the smallest cover bigger than k it found and whether it stopped at the
+    deadline in results.
+    """
+    initial_weights = [2] * graph.num_edges
+    outcomes = []
+    best_cover: Set[int] = set()
+    for restart in range(worker, max_iterations, workers):
+        if restart > best_restart.value or deadline.expired():
+            break
+        counter = OperationCounter()
+        covered, edge_cover, decisions_made = randomized_trial(graph, initial_weights, restart_rng(seed, restart),
+                                                               RestartDeadline(deadline, best_restart, restart), counter, local_search)
+        success = covered and len(edge_cover) <= nr_edge_cover
+        outcomes.append((restart, decisions_made, edge_cover if success else None, counter.counts))
+        if success:
+            with best_restart.get_lock():
+                best_restart.value = min(best_restart.value, restart)
+            break
+        if covered and (not best_cover or len(edge_cover) < len(best_cover)):
+            best_cover = edge_cover
+    results.put((outcomes, best_cover, deadline.reached))
+
+def find_edge_cover_randomized_parallel(graph: Graph, nr_edge_cover: int, max_iterations: int = 1000,
+                                        seed: Optional[int] = None, workers: Optional[int] = None,
+                                        deadline: Optional[Deadline] = None,
+                                        counter: Optional[OperationCounter] = None,
+                                        local_search: bool = False) -> Tuple[bool, Set[int], int]:
+    """
+    find_edge_cover_randomized with the restarts spread over worker processes.
+    Restart i always uses restart_rng(seed, i), and the answer is the successful restart
+    with the lowest index, so the result (cover and decisions made) is the same as the
+    sequential search with the same seed, whatever the number of workers. Workers stop
+    as soon as they reach a restart after the first success, or when the deadline expires.
+
+    Returns:
+        - bool: Whether a solution was found
+        - Set[int]: The edge ids of the cover if found, empty set otherwise (when the
+          deadline expires, the smallest cover bigger than k found so far)
+        - int: Number of decisions made (summed over every restart up to the successful one)
+
+    Basic Operations Count (recorded in counter):
+    the ones of every restart up to the successful one, like the decisions made
+    """
+    deadline = deadline or Deadline()
+    counter = counter or NULL_COUNTER
+    if seed is None:
+        seed = random.getrandbits(64)
+    workers = min(workers or os.cpu_count() or 1, max_iterations)
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        # daemon processes (the workers of experiment.py) cannot start processes
+        return find_edge_cover_randomized(graph, nr_edge_cover, max_iterations, seed, deadline, counter, local_search)
+
+    best_restart = multiprocessing.Value('q', max_iterations)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=randomized_worker,
+                                args=(graph, nr_edge_cover, max_iterations, seed, worker, workers, best_restart, results, deadline, local_search))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    outcomes = [outcome for worker_outcomes, _, _ in reports for outcome in worker_outcomes]
+    # the workers have their own copy of the deadline
+    deadline.reached = deadline.reached or any(reached for _, _, reached in reports)
+    best = best_restart.value
+    decisions_made = sum(decisions for restart, decisions, _, _ in outcomes if restart <= best)
+    for restart, _, _, counts in outcomes:
+        if restart <= best:
+            counter.record(**counts)
+    for restart, _, edge_cover, _ in outcomes:
+        if restart == best:
+            return True, edge_cover, decisions_made
+    if not deadline.reached:
+        return False, set(), decisions_made
+    covers = [cover for _, cover, _ in reports if cover]
+    return False, min(covers, key=len) if covers else set(), decisions_made
 
 """ ANALYSIS FUNCTIONS """
 
-def set_variables_and_analyze_performance(filename: str, k: float, edge_cover_save_solution: bool):
-    # Load the graph
-    graph = load_graph(filename)
-    edges = get_all_edges(graph)
-    nr_edge_cover = int(len(edges) * k)
+def set_variables_and_analyze_performance(filename: str, k: float, edge_cover_save_solution: bool, workers: int = 1,
+                                          graph: Optional[Graph] = None, time_limit: Optional[float] = None,
+                                          local_search: bool = False, components: bool = False,
+                                          kernelize: bool = False, bounds: bool = True) -> bool:
+    """
+    Run the search for one k and store the result. Returns whether it stopped at the time limit.
+    With components every connected component is solved on its own (see components.py), the
+    workers then solve the big components instead of sharing the restarts. With kernelize
+    the search runs on the kernel of the graph (see kernel.py).
+    Unless bounds is False, a k settled by FeasibilityBounds (bounds.py) is answered without a search.
+    """
+    # Load the graph (unless the caller already has it loaded)
+    if graph is None:
+        graph = load_graph_cached(filename)
+    nr_edge_cover = int(graph.num_edges * k)
+    deadline = Deadline(time_limit)
+    counter = OperationCounter()
 
     start_time = time.time()
-    success, edge_cover, decisions_made = find_edge_cover_randomized(graph, edges, nr_edge_cover)
+    answer = resolve_by_bounds(FeasibilityBounds(graph, counter), nr_edge_cover) if bounds else None
+    resolved_by = 'search' if answer is None else 'bound'
+    if answer is None:
+        if components:
+            solver = partial(find_edge_cover_by_components, solver=partial(find_edge_cover_randomized, local_search=local_search), workers=workers)
+        elif workers > 1:
+            solver = partial(find_edge_cover_randomized_parallel, workers=workers, local_search=local_search)
+        else:
+            solver = partial(find_edge_cover_randomized, local_search=local_search)
+        if kernelize:
+            solver = partial(find_edge_cover_kernelized, solver=solver)
+        answer = solver(graph, nr_edge_cover, deadline=deadline, counter=counter)
+    success, edge_cover, decisions_made = answer
     execution_time = time.time() - start_time
 
-    basic_operations_count = decisions_made * 10
+    basic_operations_count = counter.total()
 
-    write_results_to_file(filename, k, success, edge_cover, decisions_made, 
-                           execution_time, basic_operations_count, edge_cover_save_solution)
+    write_results_to_file(filename, k, success, graph.edge_labels(edge_cover), decisions_made, 
+                           execution_time, basic_operations_count, edge_cover_save_solution, deadline.reached, counter.counts, local_search, components, kernelize, resolved_by)
+    return deadline.reached
 
-def write_results_to_file(graph_filename: str, k: float, success: bool, 
-                           edge_cover: Set[Tuple[str, str]], decisions_made: int, 
-                           execution_time: float, basic_operations_count: int, 
-                           edge_cover_save_solution: bool):
-    results_filename = 'results/randomized_search_results.json'
-    
-    try:
-        with open(results_filename, 'r') as f:
-            results = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        results = {}
+def analyze_performance_multi_k(filename: str, kvalues: List[float], edge_cover_save_solution: bool, local_search: bool = False,
+                                bounds: bool = True):
+    """Same results as set_variables_and_analyze_performance for every k, loading once and sharing the restarts."""
+    graph = load_graph_cached(filename)
+    nr_edge_covers = [int(graph.num_edges * k) for k in kvalues]
+
+    start_time = time.time()
+    bounds_counter = OperationCounter()
+    answers = resolve_all_by_bounds(graph, nr_edge_covers, bounds_counter) if bounds else [None] * len(kvalues)
+    resolved_by = ['search' if answer is None else 'bound' for answer in answers]
+    counters = [OperationCounter() for _ in kvalues]
+    for counter in counters:
+        counter.merge(bounds_counter)
+    # a k settled by the bounds takes only the time of the bounds
+    answered_at = [time.time()] * len(kvalues)
+
+    searched = [i for i, answer in enumerate(answers) if answer is None]
+    if searched:
+        searched_answered_at = [0.0] * len(searched)
+        searched_answers = find_edge_cover_randomized_multi_k(graph, [nr_edge_covers[i] for i in searched],
+                                                              counters=[counters[i] for i in searched], local_search=local_search,
+                                                              answered_at=searched_answered_at)
+        for i, answer, answer_time in zip(searched, searched_answers, searched_answered_at):
+            answers[i] = answer
+            answered_at[i] = answer_time
 
-    if graph_filename not in results:
-        results[graph_filename] = []
+    # the execution time of each k runs until the restart that answered it, as if it was run alone
+    for k, (success, edge_cover, decisions_made), counter, resolved, answer_time in zip(kvalues, answers, counters, resolved_by, answered_at):
+        basic_operations_count = counter.total()
+        write_results_to_file(filename, k, success, graph.edge_labels(edge_cover), decisions_made, 
+                               answer_time - start_time, basic_operations_count, edge_cover_save_solution, operation_counts=counter.counts, local_search=local_search,
+                               resolved_by=resolved)
 
+def write_results_to_file(graph_filename: str, k: float, success: bool, 
+                           edge_cover: List[Tuple[str, str]], decisions_made: int, 
+                           execution_time: float, basic_operations_count: int, 
+                           edge_cover_save_solution: bool, timed_out: bool = False,
+                           operation_counts: Optional[Dict[str, int]] = None, local_search: bool = False,
+                           components: bool = False, kernelized: bool = False, resolved_by: str = 'search'):
     result_entry = {
         'k': k,
         'success': success,
         'decisions_made': decisions_made,
         'execution_time': execution_time,
-        'basic_operations_count': basic_operations_count
+        'basic_operations_count': basic_operations_count,
+        # 'bound' when FeasibilityBounds settled k without a search (bounds.py)
+        'resolved_by': resolved_by
     }
 
+    if operation_counts is not None:
+        # the basic operations count split by kind of operation
+        result_entry['operation_counts'] = dict(operation_counts)
+
+    if local_search:
+        # every complete cover was shrunk by improve_edge_cover
+        result_entry['local_search'] = True
+
+    if components:
+        # every connected component was solved separately (components.py)
+        result_entry['components'] = True
+
+    if kernelized:
+        # solved on the kernel of the graph, forced edges added back (kernel.py)
+        result_entry['kernelized'] = True
+
+    if timed_out:
+        # the restarts were stopped, the edge cover is the smallest one found in time
+        result_entry['timed_out'] = True
+
     if edge_cover_save_solution:
         result_entry['edge_cover'] = list(edge_cover)
 
-    results[graph_filename].append(result_entry)
-
-    with open(results_filename, 'w') as f:
-        json.dump(results, f, indent=4)
+    append_result('randomized', graph_filename, result_entry)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2 or len(sys.argv) > 3:
-        print("Usage: python randomized_search.py <graph_file> [solution]")
+    if len(sys.argv) < 2 or len(sys.argv) > 5 or any(arg not in ("solution", "parallel", "improve") for arg in sys.argv[2:]):
+        print("Usage: python randomized_search.py <graph_file> [solution] [parallel] [improve]")
         sys.exit(1)
 
     graph_filename = sys.argv[1]
-    edge_cover_save_solution = len(sys.argv) == 3 and sys.argv[2] == "solution"
+    edge_cover_save_solution = "solution" in sys.argv[2:]
+    workers = os.cpu_count() if "parallel" in sys.argv[2:] else 1
+    local_search = "improve" in sys.argv[2:]
 
     kvalues = [0.125, 0.25, 0.5, 0.75]
 
-    for k in kvalues:
-        set_variables_and_analyze_performance(graph_filename, k, edge_cover_save_solution)
\ No newline at end of file
+    if workers > 1:
+        for k in kvalues:
+            set_variables_and_analyze_performance(graph_filename, k, edge_cover_save_solution, workers, local_search=local_search)
+    else:
+        analyze_performance_multi_k(graph_filename, kvalues, edge_cover_save_solution, local_search)
\ No newline at end of file
@@ -0,0 +1,172 @@
+import json
+import os
+import sqlite3
+import sys
+from typing import Dict, List, Optional, Tuple
+
+
+""" RESULTS DATABASE """
+
+# One row per result entry. Every insert is its own transaction and WAL mode lets
+# several runs append at the same time without corrupting or losing entries.
+DATABASE = 'results/results.db'
+
+# Layout of the JSON files the plot scripts read, one per algorithm
+RESULTS_FILES = {
+    'exhaustive': 'results/exhaustive_search_results.json',
+    'greedy': 'results/greedy_search_results.json',
+    'randomized': 'results/randomized_search_results.json',
+    'randomized_twitch': 'results/randomized_search_results_twitch.json',
+    'matching': 'results/matching_search_results.json',
+}
+
+
+def connect(database: str = DATABASE) -> sqlite3.Connection:
+    """Open the results database, creating the tables and the indexes if needed."""
+    connection = sqlite3.connect(database, timeout=60)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS results ('
+        ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+        ' graph TEXT NOT NULL,'
+        ' algorithm TEXT NOT NULL,'
+        ' k REAL NOT NULL,'
+        ' entry TEXT NOT NULL)'
+    )
+    connection.execute('CREATE INDEX IF NOT EXISTS results_lookup ON results (graph, algorithm, k)')
+    # the same entry (options, counts and time included) is stored once, so importing a file twice adds nothing
+    try:
+        connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS results_unique ON results (graph, algorithm, k, entry)')
+    except sqlite3.IntegrityError:
+        # a database from before the index, with entries imported twice
+        with connection:
+            connection.execute('DELETE FROM results WHERE id NOT IN (SELECT MIN(id) FROM results GROUP BY graph, algorithm, k, entry)')
+        connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS results_unique ON results (graph, algorithm, k, entry)')
+    # status of the (graph, algorithm, k) jobs of experiment.py, so an interrupted sweep can resume
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS jobs ('
+        ' graph TEXT NOT NULL,'
+        ' algorithm TEXT NOT NULL,'
+        ' k REAL NOT NULL,'
+        ' status TEXT NOT NULL,'
+        ' PRIMARY KEY (graph, algorithm, k))'
+    )
+    return connection
+
+def append_result(algorithm: str, graph_filename: str, result_entry: Dict, database: str = DATABASE):
+    """Append one result entry (the dict written to the JSON files) atomically."""
+    connection = connect(database)
+    try:
+        with connection:
+            connection.execute(
+                'INSERT OR IGNORE INTO results (graph, algorithm, k, entry) VALUES (?, ?, ?, ?)',
+                (graph_filename, algorithm, result_entry['k'], json.dumps(result_entry))
+            )
+    finally:
+        connection.close()
+
+def find_results(graph_filename: str, algorithm: str, k: Optional[float] = None, database: str = DATABASE) -> List[Dict]:
+    """Result entries of a graph for an algorithm (and k), in the order they were appended."""
+    connection = connect(database)
+    try:
+        if k is None:
+            rows = connection.execute(
+                'SELECT entry FROM results WHERE graph = ? AND algorithm = ? ORDER BY id',
+                (graph_filename, algorithm)
+            )
+        else:
+            rows = connection.execute(
+                'SELECT entry FROM results WHERE graph = ? AND algorithm = ? AND k = ? ORDER BY id',
+                (graph_filename, algorithm, k)
+            )
+        return [json.loads(entry) for entry, in rows]
+    finally:
+        connection.close()
+
+def set_job_status(graph_filename: str, algorithm: str, k: float, status: str, database: str = DATABASE):
+    """Record the status ('done', 'timeout', 'error', ...) of an experiment job."""
+    connection = connect(database)
+    try:
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO jobs (graph, algorithm, k, status) VALUES (?, ?, ?, ?)',
+                (graph_filename, algorithm, k, status)
+            )
+    finally:
+        connection.close()
+
+def job_statuses(algorithm: str, database: str = DATABASE) -> Dict[Tuple[str, float], str]:
+    """Status of every recorded job of an algorithm, keyed by (graph, k)."""
+    connection = connect(database)
+    try:
+        return {(graph_filename, k): status for graph_filename, k, status in connection.execute(
+            'SELECT graph, k, status FROM jobs WHERE algorithm = ?', (algorithm,))}
+    finally:
+        connection.close()
+
+def export_results(algorithm: str, results_filename: Optional[str] = None, database: str = DATABASE, force: bool = False):
+    """
+    Write the results of an algorithm as {graph: [entry, ...]}, the layout the plot scripts read.
+    The file is replaced with the entries of the database only, so unless force is set an
+    existing file with entries the database does not have (e.g. the results of before the
+    database, not imported yet) is left alone and ValueError is raised.
+    """
+    results_filename = results_filename or RESULTS_FILES[algorithm]
+    connection = connect(database)
+    try:
+        results: Dict[str, List[Dict]] = {}
+        stored = set()
+        for graph_filename, entry in connection.execute(
+                'SELECT graph, entry FROM results WHERE algorithm = ? ORDER BY id', (algorithm,)):
+            results.setdefault(graph_filename, []).append(json.loads(entry))
+            stored.add((graph_filename, entry))
+    finally:
+        connection.close()
+
+    if not force and os.path.exists(results_filename):
+        with open(results_filename, 'r') as f:
+            existing = json.load(f)
+        missing = sum(1 for graph_filename, entries in existing.items() for entry in entries
+                      if (graph_filename, json.dumps(entry)) not in stored)
+        if missing:
+            raise ValueError(f"{results_filename} has {missing} entries that are not in {database}, "
+                             f"import them first (python3 results_store.py import {algorithm}) or export with --force")
+
+    with open(results_filename, 'w') as f:
+        json.dump(results, f, indent=4)
+
+def import_results(algorithm: str, results_filename: Optional[str] = None, database: str = DATABASE):
+    """Load an existing results JSON file into the database (one transaction), the entries already there are skipped."""
+    results_filename = results_filename or RESULTS_FILES[algorithm]
+    with open(results_filename, 'r') as f:
+        results = json.load(f)
+
+    connection = connect(database)
+    try:
+        with connection:
+            connection.executemany(
+                'INSERT OR IGNORE INTO results (graph, algorithm, k, entry) VALUES (?, ?, ?, ?)',
+                [(graph_filename, algorithm, entry['k'], json.dumps(entry))
+                 for graph_filename, entries in results.items() for entry in entries]
+            )
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    force = "--force" in sys.argv[1:]
+    arguments = [arg for arg in sys.argv[1:] if arg != "--force"]
+    if len(arguments) < 2 or len(arguments) > 3 or arguments[0] not in ("export", "import") or arguments[1] not in RESULTS_FILES:
+        print(f"Usage: python3 results_store.py <export|import> <{'|'.join(RESULTS_FILES)}> [results_file] [--force]")
+        sys.exit(1)
+
+    results_filename = arguments[2] if len(arguments) == 3 else None
+
+    if arguments[0] == "export":
+        try:
+            export_results(arguments[1], results_filename, force=force)
+        except ValueError as error:
+            print(error)
+            sys.exit(1)
+    else:
+        import_results(arguments[1], results_filename)
@@ -0,0 +1,51 @@
+import math
+import os
+from array import array
+
+import exhaustive_search
+from deadline import Deadline
+from graph import build_graph, load_graph
+
+
+GRAPHS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'graphs')
+
+
+def test_sharded_search_past_64_bit_ranks():
+    graph = load_graph(os.path.join(GRAPHS_FOLDER, 'graph_030_25.json'))
+    nr_edge_cover = 18
+    assert math.comb(graph.num_edges, nr_edge_cover) > 2 ** 63
+
+    expected = exhaustive_search.find_edge_cover_exhaustive_bitmask(graph, nr_edge_cover, Deadline(60))
+    answer = exhaustive_search.find_edge_cover_exhaustive_sharded(graph, nr_edge_cover, Deadline(60), workers=4)
+    assert expected[0]
+    assert answer == expected
+
+def test_resumable_search_with_no_edges(tmp_path):
+    graph = load_graph(os.path.join(GRAPHS_FOLDER, 'graph_004_12.json'))
+    checkpoint = str(tmp_path / 'checkpoint.json')
+
+    expected = exhaustive_search.find_edge_cover_exhaustive_bitmask(graph, 0)
+    assert exhaustive_search.find_edge_cover_exhaustive_resumable(graph, 0, checkpoint=checkpoint) == expected
+    assert not os.path.exists(checkpoint)
+
+    masks = exhaustive_search.edge_masks(graph)
+    all_vertices = (1 << graph.num_vertices) - 1
+    assert exhaustive_search.search_combination_range(masks, all_vertices, 0, 0, 1, Deadline())[:3] == (None, [], 1)
+
+def test_smallest_first_by_components():
+    # two disjoint 6-cycles: 3 edges cover each one
+    edge_u, edge_v = array('i'), array('i')
+    for cycle in range(2):
+        for i in range(6):
+            u, v = 6 * cycle + i, 6 * cycle + (i + 1) % 6
+            edge_u.append(min(u, v))
+            edge_v.append(max(u, v))
+    graph = build_graph([str(vertex) for vertex in range(12)], edge_u, edge_v)
+    nr_edge_cover = int(graph.num_edges * 0.75)
+
+    for components in (False, True):
+        solver = exhaustive_search.exhaustive_solver('smallest_first', components=components)
+        success, edge_cover, _ = solver(graph, nr_edge_cover, deadline=Deadline())
+        assert success
+        assert len(edge_cover) <= nr_edge_cover
+        assert exhaustive_search.is_valid_edge_cover(graph, edge_cover)
@@ -0,0 +1,30 @@
+import random
+from array import array
+
+from deadline import Deadline
+from exhaustive_search import find_edge_cover_exhaustive_bitmask, is_valid_edge_cover
+from graph import build_graph
+from kernel import find_edge_cover_kernelized
+
+
+def random_graph(rng: random.Random, num_vertices: int, probability: float):
+    edge_u, edge_v = array('i'), array('i')
+    for u in range(num_vertices):
+        for v in range(u + 1, num_vertices):
+            if rng.random() < probability:
+                edge_u.append(u)
+                edge_v.append(v)
+    return build_graph([str(vertex) for vertex in range(num_vertices)], edge_u, edge_v)
+
+def test_kernelized_answers_like_the_plain_search():
+    rng = random.Random(2024)
+    for _ in range(200):
+        graph = random_graph(rng, rng.randint(0, 8), rng.choice([0.2, 0.4, 0.7]))
+        for nr_edge_cover in range(graph.num_edges + 2):
+            expected, _, _ = find_edge_cover_exhaustive_bitmask(graph, nr_edge_cover)
+            success, edge_cover, _ = find_edge_cover_kernelized(graph, nr_edge_cover, find_edge_cover_exhaustive_bitmask,
+                                                                deadline=Deadline())
+            assert success == expected
+            if success:
+                assert len(edge_cover) <= nr_edge_cover
+                assert is_valid_edge_cover(graph, edge_cover)
@@ -0,0 +1,62 @@
+import random
+from array import array
+
+import networkx
+
+from graph import build_graph
+from matching_search import bipartition, maximum_matching, maximum_matching_blossom, maximum_matching_hopcroft_karp
+
+
+def build(num_vertices: int, edges):
+    edge_u, edge_v = array('i'), array('i')
+    for u, v in sorted(edges):
+        edge_u.append(u)
+        edge_v.append(v)
+    return build_graph([str(vertex) for vertex in range(num_vertices)], edge_u, edge_v)
+
+def random_general(rng: random.Random, num_vertices: int, probability: float):
+    edges = {(u, v) for u in range(num_vertices) for v in range(u + 1, num_vertices) if rng.random() < probability}
+    return build(num_vertices, edges), edges
+
+def random_bipartite(rng: random.Random, left: int, right: int, probability: float):
+    edges = {(u, left + v) for u in range(left) for v in range(right) if rng.random() < probability}
+    return build(left + right, edges), edges
+
+def check_matching(graph, mate, edges) -> int:
+    """Size of the matching mate, after checking it is one (symmetric, on edges of the graph)."""
+    size = 0
+    for u, v in enumerate(mate):
+        if v == -1:
+            continue
+        assert mate[v] == u
+        assert (min(u, v), max(u, v)) in edges
+        size += u < v
+    return size
+
+def expected_size(num_vertices: int, edges) -> int:
+    reference = networkx.Graph()
+    reference.add_nodes_from(range(num_vertices))
+    reference.add_edges_from(edges)
+    return len(networkx.max_weight_matching(reference, maxcardinality=True))
+
+def test_blossom_matches_networkx_on_general_graphs():
+    rng = random.Random(404)
+    for _ in range(300):
+        num_vertices = rng.randint(1, 16)
+        graph, edges = random_general(rng, num_vertices, rng.choice([0.1, 0.2, 0.35, 0.6]))
+        mate, _ = maximum_matching_blossom(graph)
+        assert check_matching(graph, mate, edges) == expected_size(num_vertices, edges)
+        mate, _ = maximum_matching(graph)
+        assert check_matching(graph, mate, edges) == expected_size(num_vertices, edges)
+
+def test_hopcroft_karp_matches_networkx_on_bipartite_graphs():
+    rng = random.Random(405)
+    for _ in range(300):
+        left, right = rng.randint(1, 10), rng.randint(1, 10)
+        graph, edges = random_bipartite(rng, left, right, rng.choice([0.1, 0.25, 0.5]))
+        colour = bipartition(graph)
+        assert colour is not None
+        mate, _ = maximum_matching_hopcroft_karp(graph, colour)
+        assert check_matching(graph, mate, edges) == expected_size(left + right, edges)
+        mate, _ = maximum_matching_blossom(graph)
+        assert check_matching(graph, mate, edges) == expected_size(left + right, edges)
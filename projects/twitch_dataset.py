@@ -0,0 +1,115 @@
+import os
+import re
+import sys
+import time
+from array import array
+from typing import Dict, Optional, Tuple
+
+from graph import (BINARY_EXTENSION, Graph, IndexLabels, build_graph, deduplicate_edges,
+                   load_graph_binary, save_graph_binary)
+
+
+""" TWITCH DATASETS """
+
+TWITCH_FOLDER = 'twitch'
+DATASETS = ['DE', 'ENGB', 'ES', 'FR', 'PTBR', 'RU']
+# column names of the properties table in twitch/README.txt
+README_COLUMNS = {'DE': 'DE', 'EN': 'ENGB', 'ES': 'ES', 'FR': 'FR', 'PT': 'PTBR', 'RU': 'RU'}
+
+# bytes read at a time from the edge list
+CHUNK_SIZE = 1 << 20
+
+
+def edges_filename(dataset: str, folder: str = TWITCH_FOLDER) -> str:
+    return os.path.join(folder, dataset, f'musae_{dataset}_edges.csv')
+
+def cache_filename(dataset: str, folder: str = TWITCH_FOLDER) -> str:
+    return os.path.join(folder, dataset, f'musae_{dataset}_edges{BINARY_EXTENSION}')
+
+def expected_sizes(folder: str = TWITCH_FOLDER) -> Dict[str, Tuple[int, int]]:
+    """(nodes, edges) of every dataset, read from the properties table of twitch/README.txt."""
+    with open(os.path.join(folder, 'README.txt'), 'r') as f:
+        rows = {}
+        for line in f:
+            cells = [cell.strip() for cell in line.strip().strip('|').split('|')]
+            if len(cells) > 1:
+                rows[cells[0]] = cells[1:]
+    columns = [README_COLUMNS[column] for column in rows['']]
+    return {dataset: (int(nodes.replace(',', '')), int(edges.replace(',', '')))
+            for dataset, nodes, edges in zip(columns, rows['Nodes'], rows['Edges'])}
+
+
+""" LOADING FUNCTIONS """
+
+def read_edges(filename: str) -> Tuple[array, array]:
+    """
+    Stream a "from,to" CSV of integer ids in chunks of CHUNK_SIZE bytes.
+    Every chunk is split on commas and newlines at once and parsed with a single map(int, ...),
+    instead of a csv row (and two int calls) per edge.
+    """
+    edge_u, edge_v = array('i'), array('i')
+    with open(filename, 'rb') as f:
+        header = f.readline()
+        if not header.strip() or header.split(b',')[0].strip().isdigit():
+            raise ValueError(f"{filename} has no header line")
+        tail = b''
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunk = tail + chunk
+            end = chunk.rfind(b'\n') + 1
+            tail = chunk[end:]
+            values = array('i', map(int, chunk[:end].replace(b'\n', b',').split(b',')[:-1]))
+            edge_u.extend(values[0::2])
+            edge_v.extend(values[1::2])
+        if tail.strip():
+            values = array('i', map(int, tail.split(b',')))
+            edge_u.extend(values[0::2])
+            edge_v.extend(values[1::2])
+    if len(edge_u) != len(edge_v):
+        raise ValueError(f"{filename} has a line without two ids")
+    return edge_u, edge_v
+
+def parse_twitch_edges(filename: str, expected: Optional[Tuple[int, int]] = None) -> Graph:
+    """Graph of a Twitch edge list, checked against the (nodes, edges) of the dataset README."""
+    edge_u, edge_v = read_edges(filename)
+    num_vertices = max(max(edge_u, default=-1), max(edge_v, default=-1)) + 1
+    edge_u, edge_v = deduplicate_edges(num_vertices, edge_u, edge_v)
+    if expected is not None and (num_vertices, len(edge_u)) != expected:
+        raise ValueError(f"{filename} has {num_vertices} nodes and {len(edge_u)} edges, "
+                         f"the dataset README says {expected[0]} nodes and {expected[1]} edges")
+    return build_graph(IndexLabels(num_vertices), edge_u, edge_v)
+
+def load_twitch(dataset: str, folder: str = TWITCH_FOLDER) -> Graph:
+    """
+    Graph of a Twitch dataset (DE, ENGB, ES, FR, PTBR or RU).
+    The parsed graph is cached as a binary file next to the CSV, and later runs memory-map
+    it instead of parsing. The cache is rebuilt when the CSV is newer.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"unknown Twitch dataset {dataset}, expected one of {', '.join(DATASETS)}")
+    filename = edges_filename(dataset, folder)
+    cached = cache_filename(dataset, folder)
+    if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(filename):
+        return load_graph_binary(cached)
+
+    graph = parse_twitch_edges(filename, expected_sizes(folder)[dataset])
+    # write to a temporary file first, so a concurrent run never maps a half written cache
+    temporary = f'{cached}.{os.getpid()}.tmp'
+    save_graph_binary(graph, temporary)
+    os.replace(temporary, cached)
+    return graph
+
+def dataset_of(filename: str) -> Optional[str]:
+    """Dataset of a path like twitch/DE/musae_DE_edges.csv (or the old musae_DE.json), None otherwise."""
+    match = re.search(r'musae_([A-Z]+)(?:_edges\.csv|\.json|_edges\.bin)$', filename)
+    return match.group(1) if match and match.group(1) in DATASETS else None
+
+
+if __name__ == "__main__":
+    datasets = sys.argv[1:] or DATASETS
+    for dataset in datasets:
+        start_time = time.time()
+        graph = load_twitch(dataset)
+        print(f"{dataset}: {graph.num_vertices} nodes, {graph.num_edges} edges ({time.time() - start_time:.3f}s)")
@@ -1,166 +1,92 @@
-import json
 import sys
 import time
-import random
-from typing import Dict, List, Set, Tuple
-import threading
+from typing import Dict, List, Optional, Tuple
 
+from bounds import FeasibilityBounds, resolve_by_bounds
+from counters import OperationCounter
+from deadline import Deadline
+from graph import Graph, load_graph
+from randomized_search import find_edge_cover_randomized
+from results_store import append_result
+from twitch_dataset import DATASETS, dataset_of, edges_filename, load_twitch
 
 
-def load_graph_json(filename: str) -> Dict[str, List[str]]:
-    """Load graph from a JSON file where keys are vertices and values are lists of connected vertices."""
-    with open(filename, 'r') as f:
-        data = json.load(f)
-        # Assuming each key in the JSON maps to a list of neighbors
-        graph = {str(key): [str(neighbor) for neighbor in value] for key, value in data.items()}
-    return graph
-
-
-def get_all_edges(graph: Dict[str, List[str]]) -> List[Tuple[str, str]]:
-    """Extract all edges from the graph as a list of tuples."""
-    edges = set()
-    for node, neighbors in graph.items():
-        for neighbor in neighbors:
-            edges.add((node, neighbor) if node < neighbor else (neighbor, node))
-    return list(edges)
-
-""" ALGORITHM FUNCTIONS """
-
-def find_edge_cover_randomized(graph: Dict[str, List[str]], edges: List[Tuple[str, str]], 
-                                nr_edge_cover: int, max_iterations: int = 1000) -> Tuple[bool, Set[Tuple[str, str]], int]:
+def load_twitch_graph(name: str) -> Tuple[str, Graph]:
     """
-    Find an edge cover using a randomized heuristic.
-    
+    Graph of a Twitch dataset given by name (DE, ENGB, ...) or by one of its files
+    (the musae_*_features.json files hold node features, not edges, so the edge list is used).
+    Other files are loaded as they are.
     Returns:
-        - bool: Whether a solution was found
-        - Set[Tuple[str, str]]: The edge cover if found, empty set otherwise
-        - int: Number of decisions made
+        - str: The edge list filename, used as the key of the results
+        - Graph: The graph
     """
-    decisions_made = 0
-    
-    for _ in range(max_iterations):
-        # reset for each iteration
-        edge_cover = set()
-        uncovered_vertices = set(graph.keys())
-        available_edges = edges.copy()
-        
-        while uncovered_vertices and available_edges:
-            decisions_made += 1
-            
-            # randomly select an edge with bias covering more uncovered vertices
-            weighted_edges = [
-                (edge, sum(1 for v in edge if v in uncovered_vertices)) 
-                for edge in available_edges
-            ]
-            
-            # Probabilistic edge selection with weight
-            total_weight = sum(weight for _, weight in weighted_edges)
-            if total_weight == 0:
-                break
-            
-            probabilities = [weight / total_weight for _, weight in weighted_edges]
-            selected_edge = random.choices([edge for edge, _ in weighted_edges], 
-                                           weights=probabilities)[0]
-            
-            edge_cover.add(selected_edge)
-            available_edges.remove(selected_edge)
-            
-            # Update uncovered vertices
-            uncovered_vertices.discard(selected_edge[0])
-            uncovered_vertices.discard(selected_edge[1])
-        
-        # Check if found a valid cover
-        if len(uncovered_vertices) == 0 and len(edge_cover) <= nr_edge_cover:
-            return True, edge_cover, decisions_made
-    
-    return False, set(), decisions_made
+    dataset = name if name in DATASETS else dataset_of(name)
+    if dataset is None:
+        return name, load_graph(name)
+    return edges_filename(dataset), load_twitch(dataset)
 
 """ ANALYSIS FUNCTIONS """
 
-class TimeLimitedComputation(threading.Thread):
-    """Thread to run the computation with a timeout."""
-    def __init__(self, target, args):
-        threading.Thread.__init__(self)
-        self.target = target
-        self.args = args
-        self.result = None
-
-    def run(self):
-        """Run the target function with provided arguments."""
-        self.result = self.target(*self.args)
-
-def set_variables_and_analyze_performance(filename: str, k: float, edge_cover_save_solution: bool):
-    # Load the graph from the JSON loader
-    graph = load_graph_json(filename)  # Updated function here
-    edges = get_all_edges(graph)
-    nr_edge_cover = int(len(edges) * k)
-    start_time = time.time()
-
+# the search stops after TIME_LIMIT seconds and reports the smallest cover found so far
+TIME_LIMIT = 600
 
-    # Start the computation in a separate thread
-    computation = TimeLimitedComputation(
-        target=find_edge_cover_randomized,
-        args=(graph, edges, nr_edge_cover)
-    )
-    computation.start()
+def set_variables_and_analyze_performance(filename: str, k: float, edge_cover_save_solution: bool, time_limit: float = TIME_LIMIT):
+    filename, graph = load_twitch_graph(filename)
+    nr_edge_cover = int(graph.num_edges * k)
+    deadline = Deadline(time_limit)
+    counter = OperationCounter()
+    start_time = time.time()
 
-    # Wait for up to 600 seconds (10 minutes)
-    computation.join(timeout=600)
+    answer = resolve_by_bounds(FeasibilityBounds(graph, counter), nr_edge_cover)
+    resolved_by = 'search' if answer is None else 'bound'
+    if answer is None:
+        answer = find_edge_cover_randomized(graph, nr_edge_cover, deadline=deadline, counter=counter)
+    success, edge_cover, decisions_made = answer
 
-    # Check if the computation finished
-    if computation.is_alive():
-        print("Execution terminated due to timeout.")
-        computation.join()  # Ensure thread resources are released
-        success, edge_cover, decisions_made = False, set(), 0
-    else:
-        success, edge_cover, decisions_made = computation.result
+    if deadline.reached:
+        print(f"Execution stopped after {time_limit:g}s, the smallest cover found has {len(edge_cover)} edges.")
 
-    execution_time = 600 if computation.is_alive() else time.time() - start_time
-    basic_operations_count = decisions_made * 10
+    execution_time = time.time() - start_time
+    basic_operations_count = counter.total()
 
-    write_results_to_file(filename, k, success, edge_cover, decisions_made, 
-                           execution_time, basic_operations_count, edge_cover_save_solution)
+    write_results_to_file(filename, k, success, graph.edge_labels(edge_cover), decisions_made, 
+                           execution_time, basic_operations_count, edge_cover_save_solution, deadline.reached, counter.counts, resolved_by)
     
 def write_results_to_file(graph_filename: str, k: float, success: bool, 
-                           edge_cover: Set[Tuple[str, str]], decisions_made: int, 
+                           edge_cover: List[Tuple[str, str]], decisions_made: int, 
                            execution_time: float, basic_operations_count: int, 
-                           edge_cover_save_solution: bool):
-    results_filename = 'results/randomized_search_results_twitch.json'
-    
-    try:
-        with open(results_filename, 'r') as f:
-            results = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        results = {}
-
-    if graph_filename not in results:
-        results[graph_filename] = []
-
+                           edge_cover_save_solution: bool, timed_out: bool = False,
+                           operation_counts: Optional[Dict[str, int]] = None, resolved_by: str = 'search'):
     result_entry = {
         'k': k,
         'success': success,
         'decisions_made': decisions_made,
         'execution_time': execution_time,
-        'basic_operations_count': basic_operations_count
+        'basic_operations_count': basic_operations_count,
+        # 'bound' when FeasibilityBounds settled k without a search (bounds.py)
+        'resolved_by': resolved_by
     }
 
+    if operation_counts is not None:
+        result_entry['operation_counts'] = dict(operation_counts)
+
+    if timed_out:
+        result_entry['timed_out'] = True
+
     if edge_cover_save_solution:
         result_entry['edge_cover'] = list(edge_cover)
 
-    results[graph_filename].append(result_entry)
-
-    with open(results_filename, 'w') as f:
-        json.dump(results, f, indent=4)
+    append_result('randomized_twitch', graph_filename, result_entry)
 
 if __name__ == "__main__":
     import sys
 
     if len(sys.argv) < 2:
-        print("Usage: python randomized_search.py <json_file> [solution]")
+        print(f"Usage: python twitch_randomized_search.py <{'|'.join(DATASETS)}|graph_file> [solution]")
         sys.exit(1)
 
-    json_file = sys.argv[1]
+    dataset = sys.argv[1]
     save_solution = len(sys.argv) > 2 and sys.argv[2].lower() == "solution"
 
     k = 0.5 
-    set_variables_and_analyze_performance(json_file, k, save_solution)
\ No newline at end of file
+    set_variables_and_analyze_performance(dataset, k, save_solution)
\ No newline at end of file